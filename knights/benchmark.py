@@ -0,0 +1,233 @@
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from logic import *
+
+
+def characters(n):
+    """Returns (knight, knave) symbol pairs for `n` characters."""
+    pairs = []
+    for i in range(n):
+        name = chr(ord("A") + i) if i < 26 else f"P{i}"
+        pairs.append((Symbol(f"{name} is a Knight"),
+                      Symbol(f"{name} is a Knave")))
+    return pairs
+
+
+def random_statement(pairs, rng):
+    """Returns a random claim about the characters."""
+    knight, knave = rng.choice(pairs)
+    other_knight, other_knave = rng.choice(pairs)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return knight
+    if kind == 1:
+        return knave
+    if kind == 2:
+        # "We are the same kind."
+        return Or(And(knight, other_knight), And(knave, other_knave))
+    if kind == 3:
+        # "At least one of us is a knave."
+        return Or(knave, other_knave)
+    # "If one is a knight, so is the other."
+    return Implication(knight, other_knight)
+
+
+def generate_puzzle(n, m, rng):
+    """
+    Returns a knowledge base for a random knights-and-knaves puzzle with
+    `n` characters who make `m` statements between them.
+
+    Each character is secretly made a knight or a knave first, and every
+    statement is said by a character for whom it is consistent with that
+    assignment, so the knowledge base always has at least one model.
+    """
+    pairs = characters(n)
+    knights = [rng.random() < 0.5 for _ in pairs]
+    hidden = dict()
+    for (knight, knave), is_knight in zip(pairs, knights):
+        hidden[knight.name] = is_knight
+        hidden[knave.name] = not is_knight
+
+    knowledge = And()
+    for knight, knave in pairs:
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+    for _ in range(m):
+
+        # Knights only make true statements, and knaves false ones
+        while True:
+            statement = random_statement(pairs, rng)
+            truth = statement.evaluate(hidden)
+            speakers = [pair for pair, is_knight in zip(pairs, knights)
+                        if is_knight == truth]
+            if speakers:
+                break
+        knight, knave = rng.choice(speakers)
+        knowledge.add(Implication(knight, statement))
+        knowledge.add(Implication(knave, Not(statement)))
+    return knowledge
+
+
+def solve_model_check(knowledge, symbols):
+    """Returns the symbols entailed by the knowledge base."""
+    return [symbol for symbol in symbols if model_check(knowledge, symbol)]
+
+
+def solve_count_models(knowledge, symbols):
+    """
+    Returns the symbols entailed by the knowledge base, using the fact
+    that it entails a symbol when no model makes that symbol false.
+    The knowledge base may be a Sentence or a compiled CNF.
+    """
+    if isinstance(knowledge, CNF):
+        variables = {name: i + 1 for i, name in enumerate(knowledge.names)}
+        return [symbol for symbol in symbols
+                if count_cnf_models(CNF(
+                    knowledge.clauses + [(-variables[symbol.name],)],
+                    knowledge.names, knowledge.num_vars)) == 0]
+    return [symbol for symbol in symbols
+            if count_models(And(knowledge, Not(symbol))) == 0]
+
+
+def solve_iter_models(knowledge, symbols):
+    """
+    Returns the symbols true in every model of the knowledge base,
+    enumerating its models only once. The knowledge base may be a
+    Sentence or a compiled CNF.
+    """
+    entailed = {symbol.name for symbol in symbols}
+    models = (iter_cnf_models(knowledge) if isinstance(knowledge, CNF)
+              else iter_models(knowledge))
+    for model in models:
+        entailed = {name for name in entailed if model[name]}
+        if not entailed:
+            break
+    return [symbol for symbol in symbols if symbol.name in entailed]
+
+
+BACKENDS = {
+    "model_check": solve_model_check,
+    "count_models": solve_count_models,
+    "iter_models": solve_iter_models
+}
+
+
+def benchmark(puzzles, solve):
+    """
+    Solves every puzzle and returns a dict of throughput, latency and
+    peak memory, along with the entailed symbols of each puzzle.
+    """
+    latencies = []
+    solutions = []
+    start = time.perf_counter()
+    for knowledge in puzzles:
+        symbols = [Symbol(name) for name in sorted(knowledge.symbols())]
+        before = time.perf_counter()
+        solutions.append([symbol.name for symbol in solve(knowledge, symbols)])
+        latencies.append(time.perf_counter() - before)
+    elapsed = time.perf_counter() - start
+
+    # Measure peak memory in a separate pass, since tracing allocations
+    # slows every backend down, and by different amounts
+    tracemalloc.start()
+    for knowledge in puzzles:
+        symbols = [Symbol(name) for name in sorted(knowledge.symbols())]
+        solve(knowledge, symbols)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "puzzles": len(puzzles),
+        "seconds": elapsed,
+        "puzzles_per_second": len(puzzles) / elapsed if elapsed else 0.0,
+        "mean_latency": statistics.mean(latencies) if latencies else 0.0,
+        "median_latency": statistics.median(latencies) if latencies else 0.0,
+        "p95_latency": (latencies[int(0.95 * (len(latencies) - 1))]
+                        if latencies else 0.0),
+        "max_latency": latencies[-1] if latencies else 0.0,
+        "peak_memory_bytes": peak,
+        "solutions": solutions
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate and solve knights-and-knaves puzzle corpora."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a random corpus")
+    generate.add_argument("file")
+    generate.add_argument("-p", "--puzzles", type=int, default=100)
+    generate.add_argument("-n", "--characters", type=int, default=3)
+    generate.add_argument("-m", "--statements", type=int, default=4)
+    generate.add_argument("-s", "--seed", type=int, default=0)
+
+    compile_ = commands.add_parser(
+        "compile", help="compile a corpus for loading without parsing"
+    )
+    compile_.add_argument("file")
+    compile_.add_argument("output")
+
+    solve = commands.add_parser(
+        "solve", help="benchmark a formula or compiled corpus"
+    )
+    solve.add_argument("file")
+    solve.add_argument("-b", "--backend", action="append",
+                       choices=sorted(BACKENDS))
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        rng = random.Random(args.seed)
+        with open(args.file, "w", encoding="utf-8") as f:
+            for _ in range(args.puzzles):
+                knowledge = generate_puzzle(args.characters, args.statements,
+                                            rng)
+                f.write(knowledge.formula() + "\n")
+        return
+
+    if args.command == "compile":
+        save_cnfs(args.output, [CNF.from_sentence(knowledge)
+                                for knowledge in load_formulas(args.file)])
+        return
+
+    # Compiled corpora are loaded as they are; model_check needs the
+    # sentences themselves
+    with open(args.file, "rb") as f:
+        compiled = f.read(len(CORPUS)) == CORPUS
+    backends = args.backend or sorted(BACKENDS)
+    if compiled:
+        if "model_check" in backends and args.backend:
+            sys.exit("model_check cannot solve a compiled corpus")
+        backends = [name for name in backends if name != "model_check"]
+    start = time.perf_counter()
+    puzzles = (load_cnfs(args.file) if compiled
+               else list(load_formulas(args.file)))
+    print(f"loaded {len(puzzles)} puzzles in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    reference = None
+    for name in backends:
+        report = benchmark(puzzles, BACKENDS[name])
+        print(name)
+        print(f"    {report['puzzles_per_second']:.1f} puzzles/sec")
+        print(f"    latency mean {report['mean_latency'] * 1000:.3f} ms, "
+              f"median {report['median_latency'] * 1000:.3f} ms, "
+              f"p95 {report['p95_latency'] * 1000:.3f} ms, "
+              f"max {report['max_latency'] * 1000:.3f} ms")
+        print(f"    peak memory {report['peak_memory_bytes'] / 1024:.1f} KiB")
+        if reference is None:
+            reference = report["solutions"]
+        elif report["solutions"] != reference:
+            sys.exit(f"{name} disagrees with the other backends")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
 import itertools
+import re
+import struct
+import sys
+import time
+from array import array
 
 
 class Sentence():
@@ -7,6 +12,14 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may not assign
+        every symbol. Returns True or False if the value is already
+        decided, or None if it depends on unassigned symbols.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -62,6 +75,11 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        if self.name in model:
+            return bool(model[self.name])
+        return None
+
     def formula(self):
         return self.name
 
@@ -86,6 +104,12 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        if value is None:
+            return None
+        return not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
@@ -120,6 +144,16 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        unknown = False
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                unknown = True
+        return None if unknown else True
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -151,6 +185,16 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        unknown = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                unknown = True
+        return None if unknown else False
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -183,6 +227,17 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -216,48 +271,760 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
+# Active Stats collector, or None when statistics are not being recorded
+collector = None
+
+
+class Stats():
+    """
+    Opt-in statistics for logical evaluation. While a Stats object is
+    active (used as a context manager), `evaluate_partial` calls, which
+    are how `model_check` evaluates sentences, are counted per connective
+    and `model_check` records the models it visits and the time it
+    spends copying them. Nothing is patched or counted outside the
+    `with` block.
+
+    Counting patches `evaluate_partial` on the connective classes
+    themselves, so it is process-global and not thread-safe: calls from
+    every thread are counted, and only one Stats object can be active
+    at a time.
+    """
+
+    CONNECTIVES = (Symbol, Not, And, Or, Implication, Biconditional)
+
+    def __init__(self):
+        self.models_visited = 0
+        self.complete_models = 0
+        self.pruned = 0
+        self.copy_time = 0.0
+        self.elapsed = 0.0
+        self.calls = {cls.__name__: 0 for cls in self.CONNECTIVES}
+        self.originals = []
+        self.start = None
+
+    def __enter__(self):
+        global collector
+        if collector is not None:
+            raise RuntimeError("statistics are already being collected")
+        collector = self
+        for cls in self.CONNECTIVES:
+            original = cls.__dict__["evaluate_partial"]
+            self.originals.append((cls, original))
+            cls.evaluate_partial = self.counted(original, self.calls,
+                                                cls.__name__)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global collector
+        self.elapsed += time.perf_counter() - self.start
+        for cls, original in self.originals:
+            cls.evaluate_partial = original
+        self.originals = []
+        collector = None
+        return False
+
+    @staticmethod
+    def counted(method, counts, name):
+        """Wraps an evaluation method so that each call is counted."""
+        def wrapper(sentence, model):
+            counts[name] += 1
+            return method(sentence, model)
+        return wrapper
+
+    def report(self):
+        """Returns the collected statistics as a dict."""
+        return {
+            "models_visited": self.models_visited,
+            "complete_models": self.complete_models,
+            "pruned": self.pruned,
+            "copy_seconds": self.copy_time,
+            "elapsed_seconds": self.elapsed,
+            "calls": dict(self.calls)
+        }
+
+
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
+    stats = collector
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+        if stats is not None:
+            stats.models_visited += 1
+            if not symbols:
+                stats.complete_models += 1
+
+        # Prune as soon as the partial model decides entailment: a model
+        # in which the knowledge base is false, or the query is true,
+        # cannot be a counterexample however the rest is assigned
+        known = knowledge.evaluate_partial(model)
+        queried = None if known is False else query.evaluate_partial(model)
+        if known is False or queried is True:
+            if stats is not None and symbols:
+                stats.pruned += 1
             return True
-        else:
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+        # Knowledge base already true and query already false
+        if known is True and queried is False:
+            return False
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+        # A complete model decides both, so some symbol is still unused;
+        # choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+        if stats is not None:
+            start = time.perf_counter()
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+        # Create a model where the symbol is true
+        model_true = model.copy()
+        model_true[p] = True
+
+        # Create a model where the symbol is false
+        model_false = model.copy()
+        model_false[p] = False
+
+        if stats is not None:
+            stats.copy_time += time.perf_counter() - start
+
+        # Ensure entailment holds in both models
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+class CNF():
+    """
+    Clausal form of a logical sentence, suitable for fast model counting.
+    Variables are positive integers and literals are signed variables.
+    Variables 1 to len(names) stand for the sentence's symbols, and any
+    variables after that are auxiliary (one per compound subsentence).
+    Every model of the sentence extends to exactly one model of the
+    clauses, so counts and models over the symbols are preserved.
+    """
+
+    def __init__(self, clauses, names, num_vars):
+        self.clauses = clauses
+        self.names = names
+        self.num_vars = num_vars
+
+    def symbols(self):
+        return set(self.names)
+
+    @classmethod
+    def from_sentence(cls, sentence, symbols=None):
+        """
+        Compiles a sentence with the Tseitin transformation. `symbols` is
+        an optional iterable of extra Symbols the models should range over.
+        """
+        names = set(sentence.symbols())
+        for symbol in symbols or ():
+            names.add(symbol.name)
+        names = sorted(names)
+        variables = {name: i + 1 for i, name in enumerate(names)}
+        clauses = []
+        defined = dict()
+        num_vars = len(names)
+
+        def define():
+            nonlocal num_vars
+            num_vars += 1
+            return num_vars
+
+        def add(*clause):
+            # Tautologies constrain nothing and are left out
+            if not any(-literal in clause for literal in clause):
+                clauses.append(clause)
+
+        def literal(sentence):
+            if isinstance(sentence, Symbol):
+                return variables[sentence.name]
+            if isinstance(sentence, Not):
+                return -literal(sentence.operand)
+            if sentence in defined:
+                return defined[sentence]
+            if isinstance(sentence, And):
+                children = [literal(c) for c in sentence.conjuncts]
+            elif isinstance(sentence, Or):
+                children = [-literal(d) for d in sentence.disjuncts]
+            elif isinstance(sentence, Implication):
+                children = [literal(sentence.antecedent),
+                            -literal(sentence.consequent)]
+            elif isinstance(sentence, Biconditional):
+                left = literal(sentence.left)
+                right = literal(sentence.right)
+                a = define()
+                add(-a, -left, right)
+                add(-a, left, -right)
+                add(a, left, right)
+                add(a, -left, -right)
+                defined[sentence] = a
+                return a
+            else:
+                raise TypeError("must be a logical sentence")
+
+            # a <=> (c1 ∧ c2 ∧ ...); Or and Implication are encoded as
+            # the negation of a conjunction of negated children
+            a = define()
+            for child in children:
+                add(-a, child)
+            add(a, *(-child for child in children))
+            if not isinstance(sentence, And):
+                a = -a
+            defined[sentence] = a
+            return a
+
+        # Top-level conjuncts become unit clauses directly
+        roots = (sentence.conjuncts if isinstance(sentence, And)
+                 else [sentence])
+        for root in roots:
+            add(literal(root))
+
+        return cls(clauses, names, num_vars)
+
+    def to_dimacs(self):
+        """
+        Returns the clauses in DIMACS CNF format, with the symbol name of
+        each non-auxiliary variable recorded in a comment line.
+        """
+        lines = [f"c var {i + 1} {name}" for i, name in enumerate(self.names)]
+        lines.append(f"p cnf {self.num_vars} {len(self.clauses)}")
+        for clause in self.clauses:
+            lines.append(" ".join(map(str, clause)) + " 0")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def from_dimacs(cls, text):
+        """Reads clauses written by `to_dimacs`."""
+        names = []
+        num_vars = None
+        literals = []
+        for line in text.splitlines():
+            if line.startswith("c var "):
+                names.append(line.split(" ", 3)[3])
+            elif line.startswith("p cnf "):
+                num_vars = int(line.split()[2])
+            elif line and line[0] != "c":
+                literals.extend(line.split())
+        if num_vars is None:
+            raise ValueError("missing DIMACS problem line")
+
+        clauses = []
+        clause = []
+        for literal in map(int, literals):
+            if literal:
+                clause.append(literal)
+            else:
+                clauses.append(tuple(clause))
+                clause = []
+        if clause:
+            raise ValueError("unterminated DIMACS clause")
+        return cls(clauses, names, num_vars)
+
+
+def clause_variables(clauses):
+    """Returns the set of variables occurring in a list of clauses."""
+    return {abs(literal) for clause in clauses for literal in clause}
+
+
+def simplify(clauses, literal):
+    """
+    Returns the clauses that remain once `literal` is made true, with
+    satisfied clauses dropped, or None if a clause becomes empty.
+    """
+    simplified = []
+    for clause in clauses:
+        if literal in clause:
+            continue
+        if -literal in clause:
+            clause = clause - {-literal}
+            if not clause:
+                return None
+        simplified.append(clause)
+    return simplified
+
+
+def propagate(clauses, trail, literal=None):
+    """
+    Applies unit propagation, after first making `literal` true if one is
+    given, and appends the literals it makes true to `trail`. Returns
+    the simplified clauses, or None on a conflict.
+
+    Each clause's literals are indexed once, so that making a literal
+    true only visits the clauses containing it or its negation.
+    """
+    occurrences = dict()
+    units = []
+    for index, clause in enumerate(clauses):
+        if len(clause) == 1:
+            units.extend(clause)
+        for l in clause:
+            occurrences.setdefault(l, []).append(index)
+    if literal is not None:
+        units.append(literal)
+    if not units:
+        return clauses
+
+    # For each clause, whether it is satisfied, and how many of its
+    # literals are not yet false
+    satisfied = [False] * len(clauses)
+    remaining = [len(clause) for clause in clauses]
+    assigned = set()
+    while units:
+        literal = units.pop()
+        if literal in assigned:
+            continue
+        if -literal in assigned:
+            return None
+        assigned.add(literal)
+        trail.append(literal)
+        for index in occurrences.get(literal, ()):
+            satisfied[index] = True
+        for index in occurrences.get(-literal, ()):
+            if satisfied[index]:
+                continue
+            remaining[index] -= 1
+            if remaining[index] == 0:
+                return None
+            if remaining[index] == 1:
+                units.extend(l for l in clauses[index]
+                             if -l not in assigned)
+
+    falsified = {-l for l in assigned}
+    return [clause - falsified if remaining[index] < len(clause) else clause
+            for index, clause in enumerate(clauses)
+            if not satisfied[index]]
+
+
+def components(clauses):
+    """Splits clauses into groups that share no variables."""
+    parent = dict()
+
+    def find(v):
+        while parent.setdefault(v, v) != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for clause in clauses:
+        first = find(abs(next(iter(clause))))
+        for literal in clause:
+            root = find(abs(literal))
+            if root != first:
+                parent[root] = first
+
+    groups = dict()
+    for clause in clauses:
+        groups.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return list(groups.values())
+
+
+def branch_variable(clauses):
+    """Returns the variable occurring in the most clauses."""
+    occurrences = dict()
+    for clause in clauses:
+        for literal in clause:
+            v = abs(literal)
+            occurrences[v] = occurrences.get(v, 0) + 1
+    return max(occurrences, key=occurrences.get)
+
+
+def count_clause_models(clauses, cache):
+    """
+    Counts assignments to the variables of `clauses` that satisfy them,
+    splitting into independent components and caching each component.
+    """
+    # Depth-first count with an explicit stack, so that the depth is not
+    # limited by Python's recursion limit. Each set of clauses being
+    # counted has a frame [total, components, index, key, branches,
+    # found, lost]: the product so far and the components still to
+    # multiply in, and for the component at `index`, its cache key, the
+    # (clauses, lost variables) of the branches still to count, the
+    # models found in earlier branches and the variables the branch
+    # being counted lost.
+    stack = []
+    pending = clauses
+    count = None
+    while True:
+        if pending is not None:
+            variables = clause_variables(pending)
+            trail = []
+            clauses = propagate(pending, trail)
+            pending = None
+            if clauses is None:
+                count = 0
+            else:
+                # Variables that vanished without being assigned are
+                # unconstrained
+                free = len(variables) - len(clause_variables(clauses)) \
+                    - len(trail)
+                stack.append([2 ** free, components(clauses), 0,
+                              None, None, 0, 0])
+
+        if not stack:
+            return count
+        frame = stack[-1]
+        if count is not None:
+            frame[5] += 2 ** frame[6] * count
+            count = None
+
+        while True:
+            total, parts, index, key, branches, found, _ = frame
+            if branches is None:
+                if not total or index == len(parts):
+                    stack.pop()
+                    count = total
+                    break
+                component = parts[index]
+                key = frozenset(component)
+                if key in cache:
+                    frame[0] = total * cache[key]
+                    frame[2] = index + 1
+                    continue
+                size = len(clause_variables(component))
+                v = branch_variable(component)
+                frame[3] = key
+                frame[4] = []
+                frame[5] = 0
+                for literal in (-v, v):
+                    branch = simplify(component, literal)
+                    if branch is not None:
+                        lost = size - 1 - len(clause_variables(branch))
+                        frame[4].append((branch, lost))
+            elif branches:
+                pending, frame[6] = branches.pop()
+                break
+            else:
+                cache[key] = found
+                frame[0] = total * found
+                frame[2] = index + 1
+                frame[4] = None
+
+
+def count_models(knowledge, symbols=None):
+    """
+    Returns the number of models of the knowledge base, over its own
+    symbols plus any extra Symbols given in `symbols`.
+    """
+    return count_cnf_models(CNF.from_sentence(knowledge, symbols))
+
+
+def count_cnf_models(cnf):
+    """
+    Returns the number of models of compiled clauses, such as a CNF
+    read back from a file, over the symbols in cnf.names.
+    """
+    clauses = [frozenset(clause) for clause in cnf.clauses]
+    free = cnf.num_vars - len(clause_variables(clauses))
+    return 2 ** free * count_clause_models(clauses, dict())
+
+
+def iter_models(knowledge, symbols=None):
+    """
+    Lazily yields every model of the knowledge base as a dict mapping
+    symbol names to truth values, over its own symbols plus any extra
+    Symbols given in `symbols`.
+    """
+    yield from iter_cnf_models(CNF.from_sentence(knowledge, symbols))
+
+
+def iter_cnf_models(cnf):
+    """
+    Lazily yields every model of compiled clauses as a dict mapping the
+    symbol names in cnf.names to truth values.
+    """
+    originals = len(cnf.names)
+
+    def search(clauses, assignment):
+        # Depth-first search for the models of one component, with an
+        # explicit stack of frames [clauses, trail, branch variable, next
+        # branch] so that the depth is not limited by Python's recursion
+        # limit. Yields `assignment` each time it holds a model.
+        stack = []
+        pending = (clauses, None)
+        while True:
+            if pending is not None:
+                trail = []
+                clauses = propagate(pending[0], trail, pending[1])
+                pending = None
+                if clauses is not None:
+                    for literal in trail:
+                        assignment[abs(literal)] = literal > 0
+                    if not clauses:
+                        yield assignment
+                        for literal in trail:
+                            del assignment[abs(literal)]
+                    else:
+                        # Branch on the KB's own symbols before auxiliary
+                        # variables
+                        v = min(clause_variables(clauses))
+                        stack.append([clauses, trail, v, 0])
+
+            if not stack:
+                return
+            frame = stack[-1]
+            clauses, trail, v, branch = frame
+            if branch == 2:
+                stack.pop()
+                for literal in trail:
+                    del assignment[abs(literal)]
+                continue
+            frame[3] = branch + 1
+            pending = (clauses, v if branch == 0 else -v)
+
+    trail = []
+    clauses = propagate([frozenset(clause) for clause in cnf.clauses], trail)
+    if clauses is None:
+        return
+    fixed = {cnf.names[abs(literal) - 1]: literal > 0 for literal in trail
+             if abs(literal) <= originals}
+
+    # Components share no variables, so the models are every combination
+    # of one model of each, enumerated like an odometer; each component's
+    # models are kept as they are found, to be combined again later
+    searches = []
+    found = []
+
+    def model_of(c, i):
+        while len(found[c]) <= i and searches[c] is not None:
+            assignment = next(searches[c], None)
+            if assignment is None:
+                searches[c] = None
+            else:
+                found[c].append({cnf.names[v - 1]: value
+                                 for v, value in assignment.items()
+                                 if v <= originals})
+        return found[c][i] if i < len(found[c]) else None
+
+    for component in components(clauses):
+        searches.append(search(component, dict()))
+        found.append([])
+    if any(model_of(c, 0) is None for c in range(len(searches))):
+        return
+
+    indexes = [0] * len(searches)
+    while True:
+        model = dict(fixed)
+        for c, i in enumerate(indexes):
+            model.update(found[c][i])
+        free = [name for name in cnf.names if name not in model]
+        for values in itertools.product((True, False), repeat=len(free)):
+            complete = dict(model)
+            complete.update(zip(free, values))
+            yield complete
+
+        # Advance to the next combination
+        c = len(indexes) - 1
+        while c >= 0:
+            indexes[c] += 1
+            if model_of(c, indexes[c]) is not None:
+                break
+            indexes[c] = 0
+            c -= 1
+        if c < 0:
+            return
+
+
+TOKEN = re.compile(r"\s*(?:(<=>|=>|¬|∧|∨|\(|\))|([^¬∧∨()<=>]+))")
+
+PRECEDENCE = {"<=>": 1, "=>": 2, "∨": 3, "∧": 4}
+
+CONNECTIVES = {
+    "<=>": Biconditional,
+    "=>": Implication,
+    "∨": Or,
+    "∧": And
+}
+
+
+def parse(text):
+    """
+    Parses a formula in the syntax produced by `Sentence.formula` back
+    into a sentence, using an operator-precedence parser rather than
+    recursion. From loosest to tightest binding the connectives are
+    <=>, =>, ∨, ∧ and ¬; <=> and => group to the right.
+    """
+    operators = []
+
+    # Operands are [sentence, parenthesized] pairs; parenthesized
+    # conjunctions and disjunctions are not merged with their neighbors
+    operands = []
+
+    def reduce():
+        operator = operators.pop()
+        if operator == "¬":
+            operands[-1] = [Not(operands[-1][0]), False]
+            return
+        right, _ = operands.pop()
+        left, parenthesized = operands.pop()
+        connective = CONNECTIVES[operator]
+        if connective is And and isinstance(left, And) and not parenthesized:
+            left.add(right)
+        elif connective is Or and isinstance(left, Or) and not parenthesized:
+            Sentence.validate(right)
+            left.disjuncts.append(right)
+        else:
+            left = connective(left, right)
+        operands.append([left, False])
+
+    expect_operand = True
+    position = 0
+    end = len(text.rstrip())
+    while position < end:
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"unexpected character at {position}: {text!r}")
+        position = match.end()
+        token, name = match.groups()
+
+        if name is not None:
+            if not expect_operand:
+                raise ValueError(f"missing connective before {name.strip()!r}")
+            operands.append([Symbol(name.strip()), False])
+            expect_operand = False
+        elif token in ("¬", "("):
+            if not expect_operand:
+                raise ValueError(f"missing connective before {token!r}")
+            operators.append(token)
+        elif token == ")":
+            if expect_operand:
+                raise ValueError("empty parentheses or missing operand")
+            while operators and operators[-1] != "(":
+                reduce()
+            if not operators:
+                raise ValueError("unbalanced parentheses")
+            operators.pop()
+            operands[-1][1] = True
+        else:
+            if expect_operand:
+                raise ValueError(f"missing operand before {token!r}")
+            precedence = PRECEDENCE[token]
+            while operators and operators[-1] != "(" and (
+                operators[-1] == "¬"
+                or PRECEDENCE[operators[-1]] > precedence
+                or (PRECEDENCE[operators[-1]] == precedence
+                    and token in ("∧", "∨"))
+            ):
+                reduce()
+            operators.append(token)
+            expect_operand = True
+
+    if expect_operand:
+        raise ValueError("missing operand at end of formula")
+    while operators:
+        if operators[-1] == "(":
+            raise ValueError("unbalanced parentheses")
+        reduce()
+    return operands[0][0]
+
+
+def load_formulas(path):
+    """Yields a sentence for each non-blank line of a formula file."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield parse(line)
+
+
+# Magic number at the start of compiled corpus files
+CORPUS = b"KCN1"
+
+# Array typecodes of clause lengths and literals by element size in bytes
+TYPECODES = {2: ("H", "h"), 4: ("I", "i")}
+
+
+def save_cnfs(path, cnfs):
+    """
+    Writes compiled knowledge bases to a binary corpus file, for
+    load_cnfs. After the magic number and the number of CNFs, each CNF
+    is its num_vars, names and clause counts as little-endian 32-bit
+    integers, its element size, its names NUL-separated in UTF-8, then
+    its clause lengths and its literals as arrays of 16-bit integers,
+    or of 32-bit integers if they do not fit.
+    """
+    with open(path, "wb") as f:
+        f.write(CORPUS + struct.pack("<I", len(cnfs)))
+        for cnf in cnfs:
+            if any("\0" in name for name in cnf.names):
+                raise ValueError("symbol names may not contain NUL")
+            names = "\0".join(cnf.names).encode("utf-8")
+            longest = max(map(len, cnf.clauses), default=0)
+            size = 2 if max(cnf.num_vars, longest) < 2 ** 15 else 4
+            lengths_code, literals_code = TYPECODES[size]
+            lengths = array(lengths_code, map(len, cnf.clauses))
+            literals = array(literals_code,
+                             itertools.chain.from_iterable(cnf.clauses))
+            if sys.byteorder == "big":
+                lengths.byteswap()
+                literals.byteswap()
+            f.write(struct.pack("<IIIIB", cnf.num_vars, len(cnf.names),
+                                len(names), len(cnf.clauses), size))
+            f.write(names)
+            f.write(lengths.tobytes())
+            f.write(literals.tobytes())
+
+
+def load_cnfs(path):
+    """
+    Returns the list of CNFs in a corpus file written by save_cnfs,
+    ready for count_cnf_models and iter_cnf_models without parsing or
+    compiling formulas again.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != CORPUS:
+        raise ValueError("Not a compiled corpus")
+    count, = struct.unpack_from("<I", data, 4)
+    offset = 8
+    cnfs = []
+    for _ in range(count):
+        num_vars, num_names, names_size, num_clauses, size = \
+            struct.unpack_from("<IIIIB", data, offset)
+        offset += 17
+        names = data[offset:offset + names_size].decode("utf-8")
+        names = names.split("\0") if num_names else []
+        offset += names_size
+
+        lengths_code, literals_code = TYPECODES[size]
+        lengths = array(lengths_code)
+        lengths.frombytes(data[offset:offset + size * num_clauses])
+        offset += size * num_clauses
+        literals = array(literals_code)
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        end = offset + size * sum(lengths)
+        literals.frombytes(data[offset:end])
+        offset = end
+        if sys.byteorder == "big":
+            literals.byteswap()
+
+        literals = iter(literals.tolist())
+        clauses = [tuple(itertools.islice(literals, length))
+                   for length in lengths]
+        cnfs.append(CNF(clauses, names, num_vars))
+    return cnfs
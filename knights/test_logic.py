@@ -0,0 +1,189 @@
+import inspect
+import itertools
+import random
+import sys
+
+from logic import *
+import puzzle
+
+A = Symbol("A")
+B = Symbol("B")
+C = Symbol("C")
+D = Symbol("D")
+
+
+def random_sentence(depth, rng):
+    """Returns a random sentence over A, B, C and D."""
+    if depth == 0:
+        return rng.choice([A, B, C, D])
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(depth - 1, rng))
+    left = random_sentence(depth - 1, rng)
+    right = random_sentence(depth - 1, rng)
+    return [And, Or, Implication, Biconditional][kind - 1](left, right)
+
+
+def all_models(knowledge):
+    """Returns every model of the knowledge base, by enumeration."""
+    names = sorted(knowledge.symbols())
+    models = []
+    for values in itertools.product((True, False), repeat=len(names)):
+        model = dict(zip(names, values))
+        if knowledge.evaluate(model):
+            models.append(model)
+    return models
+
+
+def key(model):
+    """Returns a model as a sortable tuple."""
+    return tuple(sorted(model.items()))
+
+
+def test_iter_models_matches_enumeration():
+    rng = random.Random(0)
+    for _ in range(500):
+        knowledge = random_sentence(3, rng)
+        models = list(iter_models(knowledge))
+        assert len(models) == len({key(model) for model in models})
+        expected = all_models(knowledge)
+        assert sorted(map(key, models)) == sorted(map(key, expected))
+        assert count_models(knowledge) == len(models)
+
+
+def test_iter_models_deep_search():
+    # A chain of 1200 symbols needs far more branching decisions than
+    # Python's recursion limit allows
+    x = [Symbol(f"x{i}") for i in range(1200)]
+    knowledge = And(*[Or(x[i], x[i + 1]) for i in range(1199)])
+    model = next(iter_models(knowledge))
+    assert len(model) == 1200
+    assert knowledge.evaluate(model)
+
+
+def test_count_models_deep_search():
+    # Count a chain of 600 symbols with little stack to spare, so that
+    # any recursion per branching decision would fail
+    x = [Symbol(f"x{i}") for i in range(600)]
+    knowledge = And(*[Or(x[i], x[i + 1]) for i in range(599)])
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 50)
+    try:
+        count = count_models(knowledge)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    # Assignments with no two adjacent false symbols: Fibonacci numbers
+    expected, following = 2, 3
+    for _ in range(599):
+        expected, following = following, expected + following
+    assert count == expected
+
+
+def complete_models(names):
+    """Yields every assignment of truth values to the given names."""
+    for values in itertools.product((True, False), repeat=len(names)):
+        yield dict(zip(names, values))
+
+
+def test_evaluate_partial_matches_evaluate():
+    rng = random.Random(1)
+    sentences = [random_sentence(3, rng) for _ in range(300)]
+    for sentence in sentences + [Not(A), And(A, B), Or(A, B),
+                                 Implication(A, B), Biconditional(A, B)]:
+        for model in complete_models(["A", "B", "C", "D"]):
+            assert sentence.evaluate_partial(model) == sentence.evaluate(model)
+
+
+def test_model_check_matches_enumeration():
+    rng = random.Random(2)
+    for _ in range(500):
+        knowledge = random_sentence(3, rng)
+        query = random_sentence(2, rng)
+        names = sorted(knowledge.symbols() | query.symbols())
+        entailed = all(query.evaluate(model)
+                       for model in complete_models(names)
+                       if knowledge.evaluate(model))
+        assert model_check(knowledge, query) == entailed
+
+
+def puzzle_sentences():
+    """Returns the knowledge bases of puzzle.py and their parts."""
+    knowledge = [puzzle.knowledge0, puzzle.knowledge1, puzzle.knowledge2,
+                 puzzle.knowledge3]
+    return knowledge + [part for kb in knowledge for part in kb.conjuncts]
+
+
+def test_parse_round_trip():
+    rng = random.Random(3)
+    sentences = [random_sentence(4, rng) for _ in range(300)]
+    for sentence in sentences + puzzle_sentences():
+        formula = sentence.formula()
+        assert parse(formula).formula() == formula
+
+
+def test_parse_errors():
+    for text in ["(A", "A ∧", "=> A"]:
+        try:
+            parse(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"parsed {text!r}")
+
+
+def test_dimacs_round_trip():
+    rng = random.Random(4)
+    sentences = [random_sentence(3, rng) for _ in range(200)]
+    for sentence in sentences + puzzle_sentences()[:4]:
+        cnf = CNF.from_sentence(sentence)
+        loaded = CNF.from_dimacs(cnf.to_dimacs())
+        assert loaded.names == cnf.names
+        assert loaded.num_vars == cnf.num_vars
+        assert [list(clause) for clause in loaded.clauses] == \
+            [list(clause) for clause in cnf.clauses]
+        assert count_cnf_models(loaded) == count_models(sentence)
+
+
+def test_cnf_corpus_round_trip(tmp_path):
+    rng = random.Random(5)
+    sentences = [random_sentence(3, rng) for _ in range(200)]
+    sentences += puzzle_sentences()[:4]
+    cnfs = [CNF.from_sentence(sentence) for sentence in sentences]
+    cnfs.append(CNF([(1, -2)] + [tuple(range(1, 40001))], ["A", "B"], 40000))
+    path = tmp_path / "corpus.cnf"
+    save_cnfs(path, cnfs)
+    loaded = load_cnfs(path)
+    assert len(loaded) == len(cnfs)
+    for cnf, copy in zip(cnfs, loaded):
+        assert copy.names == cnf.names
+        assert copy.num_vars == cnf.num_vars
+        assert copy.clauses == [tuple(clause) for clause in cnf.clauses]
+    for sentence, cnf in zip(sentences, loaded):
+        assert count_cnf_models(cnf) == count_models(sentence)
+        assert sorted(map(key, iter_cnf_models(cnf))) == \
+            sorted(map(key, iter_models(sentence)))
+
+
+def test_stats_report():
+    originals = {cls: cls.__dict__["evaluate_partial"]
+                 for cls in Stats.CONNECTIVES}
+    knowledge = And(Or(A, B), Implication(B, C), Not(Biconditional(A, D)))
+    with Stats() as stats:
+        assert model_check(knowledge, Or(A, C))
+        assert not model_check(knowledge, D)
+    report = stats.report()
+
+    # The knowledge base, the only And, is evaluated at every node
+    calls = report["calls"]
+    assert report["models_visited"] == calls["And"]
+    assert report["pruned"] > 0
+    assert report["pruned"] + report["complete_models"] <= \
+        report["models_visited"]
+    assert calls["Symbol"] > 0 and calls["Implication"] > 0
+    assert set(calls) == {cls.__name__ for cls in Stats.CONNECTIVES}
+
+    # Nothing is counted once the block ends
+    for cls, method in originals.items():
+        assert cls.__dict__["evaluate_partial"] is method
+    model_check(knowledge, A)
+    assert stats.report() == report
@@ -0,0 +1,289 @@
+"""
+Headless Minesweeper benchmark
+
+Plays many seeded games of Minesweeper with MinesweeperAI over a process
+pool, without pygame, and reports the win rate, moves per second,
+inference time per move and knowledge base size. Every cell uncovered,
+including those of zero regions revealed together, counts as a move.
+
+Games can be saved as replay logs, a board snapshot and the cells the AI
+chose, and replayed offline to time or profile every move, optionally
+from, or up to, a snapshot of the AI's knowledge.
+
+Usage: python benchmark.py [--games N] [--height H] [--width W]
+                           [--mines M | --density D] [--guess MODE] ...
+       python benchmark.py --replay FILE [--start AI-SNAPSHOT]
+                           [--until N] [--snapshot OUT] [--profile]
+"""
+
+import argparse
+import cProfile
+import json
+import multiprocessing
+import os
+import pstats
+import random
+import statistics
+import struct
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# How the AI moves when it knows no safe cell
+GUESSES = {
+    "random": MinesweeperAI.make_random_move,
+    "probability": MinesweeperAI.make_guess_move
+}
+
+# Magic number at the start of replay logs
+REPLAY = b"MSR1"
+
+
+def play(task):
+    """
+    Plays one game and returns its record as a dict.
+    """
+    seed, height, width, mines, guess = task
+    random.seed(f"guesses {seed}")
+    game = Minesweeper(height=height, width=width, mines=mines, seed=seed)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    guess_move = GUESSES[guess]
+
+    log = []
+    moves = 0
+    guesses = 0
+    inference = 0.0
+    knowledge = 0
+    won = False
+    start = time.perf_counter()
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = guess_move(ai)
+            if move is None:
+                break
+            guesses += 1
+        log.append(move[0] * width + move[1])
+        if game.is_mine(move):
+            break
+        uncovered = game.reveal(move, ai.moves_made)
+        moves += len(uncovered)
+        before = time.perf_counter()
+        ai.add_knowledge_batch(uncovered)
+        inference += time.perf_counter() - before
+        knowledge = max(knowledge, len(ai.sentences))
+        if len(ai.moves_made) == height * width - mines:
+            won = True
+            break
+    return {
+        "seed": seed,
+        "won": won,
+        "moves": moves,
+        "guesses": guesses,
+        "seconds": time.perf_counter() - start,
+        "inference_seconds": inference,
+        "max_knowledge": knowledge,
+        "log": log,
+        "board": game.to_bytes()
+    }
+
+
+def save_replay(path, game, log):
+    """
+    Writes a replay log: a snapshot of the board, then the index
+    i * width + j of each cell chosen, in order.
+    """
+    board = game.to_bytes()
+    with open(path, "wb") as f:
+        f.write(REPLAY + struct.pack("<I", len(board)) + board
+                + struct.pack(f"<I{len(log)}I", len(log), *log))
+
+
+def load_replay(path):
+    """
+    Returns the board and the list of cells chosen in a replay log
+    written by save_replay.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != REPLAY:
+        raise ValueError("Not a replay log")
+    size, = struct.unpack_from("<I", data, 4)
+    game = Minesweeper.from_bytes(data[8:8 + size])
+    count, = struct.unpack_from("<I", data, 8 + size)
+    log = struct.unpack_from(f"<{count}I", data, 12 + size)
+    return game, [divmod(index, game.width) for index in log]
+
+
+def replay(game, moves, ai=None, until=None):
+    """
+    Plays the moves of a replay into a new AI, or into `ai` skipping
+    cells it has already chosen, stopping after `until` moves or at a
+    mine. Returns the AI and the time add_knowledge_batch took for
+    each move played.
+    """
+    if ai is None:
+        ai = MinesweeperAI(height=game.height, width=game.width,
+                           mines=len(game.mines))
+    times = []
+    for number, move in enumerate(moves):
+        if until is not None and number >= until:
+            break
+        if move in ai.moves_made:
+            continue
+        if game.is_mine(move):
+            break
+        uncovered = game.reveal(move, ai.moves_made)
+        before = time.perf_counter()
+        ai.add_knowledge_batch(uncovered)
+        times.append((number, time.perf_counter() - before))
+    return ai, times
+
+
+def benchmark(games, height, width, mines, guess="probability", seed=0,
+              processes=None):
+    """
+    Plays `games` games seeded seed, seed + 1, ... and returns a dict
+    summarizing them, the list of game records, and each game's board
+    snapshot and list of cell indexes chosen.
+    """
+    tasks = [(seed + index, height, width, mines, guess)
+             for index in range(games)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        chunksize = max(1, games // (8 * (processes or
+                                          multiprocessing.cpu_count())))
+        records = pool.map(play, tasks, chunksize)
+    elapsed = time.perf_counter() - start
+
+    # Keep the replays apart from the records
+    replays = [(record.pop("board"), record.pop("log"))
+               for record in records]
+
+    moves = sum(record["moves"] for record in records)
+    playing = sum(record["seconds"] for record in records)
+    inference = sum(record["inference_seconds"] for record in records)
+    return {
+        "games": games,
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "guess": guess,
+        "seconds": elapsed,
+        "win_rate": sum(record["won"] for record in records) / games,
+        "moves": moves,
+        "moves_per_second": moves / playing if playing else 0.0,
+        "inference_per_move": inference / moves if moves else 0.0,
+        "guesses_per_game": sum(record["guesses"] for record in records)
+                            / games,
+        "mean_max_knowledge": statistics.mean(record["max_knowledge"]
+                                              for record in records),
+        "max_knowledge": max(record["max_knowledge"] for record in records)
+    }, records, replays
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MinesweeperAI.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    mines = parser.add_mutually_exclusive_group()
+    mines.add_argument("--mines", type=int, default=None)
+    mines.add_argument("--density", type=float, default=None,
+                       help="fraction of cells that are mines")
+    parser.add_argument("--guess", choices=sorted(GUESSES),
+                        default="probability")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--json", help="write summary and games to this file")
+    parser.add_argument("--save", metavar="DIR",
+                        help="write a replay log of each game lost to DIR")
+    parser.add_argument("--save-all", action="store_true",
+                        help="with --save, write won games too")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="time the moves of a replay log instead")
+    parser.add_argument("--start", metavar="SNAPSHOT",
+                        help="replay from a saved AI snapshot")
+    parser.add_argument("--until", type=int, default=None,
+                        help="stop the replay after this many moves")
+    parser.add_argument("--snapshot", metavar="OUT",
+                        help="write the AI's state at the end of the replay")
+    parser.add_argument("--profile", action="store_true",
+                        help="run the replay under cProfile")
+    args = parser.parse_args()
+
+    if args.replay:
+        return replay_main(args)
+
+    cells = args.height * args.width
+    if args.mines is not None:
+        count = args.mines
+    elif args.density is not None:
+        count = round(args.density * cells)
+    else:
+        count = round(cells / 8)
+    if not 0 < count < cells:
+        parser.error("the board needs at least one mine and one safe cell")
+
+    summary, records, replays = benchmark(args.games, args.height,
+                                          args.width, count, args.guess,
+                                          args.seed, args.processes)
+
+    print(f"{args.games} games of {args.height}x{args.width} with {count} "
+          f"mines, {args.guess} guesses, in {summary['seconds']:.2f}s")
+    print(f"    win rate {summary['win_rate']:.1%}, "
+          f"{summary['guesses_per_game']:.2f} guesses per game")
+    print(f"    {summary['moves_per_second']:.0f} moves/sec, inference "
+          f"{summary['inference_per_move'] * 1000:.3f} ms per move")
+    print(f"    knowledge base up to {summary['mean_max_knowledge']:.1f} "
+          f"sentences per game on average, {summary['max_knowledge']} at most")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "games": records}, f, indent=2)
+
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        for record, (board, log) in zip(records, replays):
+            if args.save_all or not record["won"]:
+                save_replay(os.path.join(args.save,
+                                         f"game-{record['seed']}.replay"),
+                            Minesweeper.from_bytes(board), log)
+
+
+def replay_main(args):
+    """
+    Replays a saved game and reports the time taken by each move.
+    """
+    game, moves = load_replay(args.replay)
+    ai = None
+    if args.start:
+        with open(args.start, "rb") as f:
+            ai = MinesweeperAI.from_bytes(f.read())
+
+    profile = cProfile.Profile() if args.profile else None
+    if profile:
+        profile.enable()
+    ai, times = replay(game, moves, ai, args.until)
+    if profile:
+        profile.disable()
+
+    total = sum(seconds for _, seconds in times)
+    print(f"replayed {len(times)} of {len(moves)} moves on "
+          f"{game.height}x{game.width} with {len(game.mines)} mines "
+          f"in {total * 1000:.3f} ms")
+    for number, seconds in sorted(times, key=lambda t: -t[1])[:5]:
+        print(f"    move {number} {moves[number]}: "
+              f"{seconds * 1000:.3f} ms")
+    print(f"    {len(ai.sentences)} sentences, {len(ai.mines)} mines and "
+          f"{len(ai.safes)} safe cells known")
+
+    if args.snapshot:
+        with open(args.snapshot, "wb") as f:
+            f.write(ai.to_bytes())
+    if profile:
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(15)
+
+
+if __name__ == "__main__":
+    main()
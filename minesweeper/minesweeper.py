@@ -1,5 +1,54 @@
 import itertools
+import math
 import random
+import struct
+import time
+from collections import deque
+from fractions import Fraction
+
+# Neighbor tables for each board shape, keyed on (height, width)
+neighbor_tables = {}
+
+
+def neighbor_table(height, width):
+    """
+    Returns a list giving, for each cell index i * width + j of a board
+    of the given shape, the tuple of the indexes of its neighbors. Tables
+    are built once per shape and shared.
+    """
+    key = (height, width)
+    table = neighbor_tables.get(key)
+    if table is None:
+        table = []
+        for i in range(height):
+            for j in range(width):
+                table.append(tuple(
+                    ni * width + nj
+                    for ni in range(max(0, i - 1), min(height, i + 2))
+                    for nj in range(max(0, j - 1), min(width, j + 2))
+                    if (ni, nj) != (i, j)
+                ))
+        neighbor_tables[key] = table
+    return table
+
+
+def pack_cells(cells, width, size):
+    """
+    Returns a set of (i, j) cells as a bitmask of `size` bytes.
+    """
+    mask = 0
+    for i, j in cells:
+        mask |= 1 << (i * width + j)
+    return mask.to_bytes(size, "little")
+
+
+def unpack_cells(data, width):
+    """
+    Returns the set of (i, j) cells in a bitmask written by pack_cells.
+    """
+    mask = int.from_bytes(data, "little")
+    return {divmod(index, width) for index in range(len(data) * 8)
+            if mask >> index & 1}
 
 
 class Minesweeper():
@@ -7,32 +56,69 @@ class Minesweeper():
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, seed=None):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Place all the mines at once, from a generator seeded with `seed`
+        # if one is given, or from the random module otherwise
+        rng = random if seed is None else random.Random(seed)
+        self.place_mines(rng.sample(range(height * width), mines))
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    def place_mines(self, indexes):
+        """
+        Fills the board with mines at the given cell indexes.
+        """
+        height, width = self.height, self.width
+
+        # Initialize the field as a flat list, with cell (i, j) at index
+        # i * width + j, and count the mines next to each cell
+        neighbors = neighbor_table(height, width)
+        self.mines = set()
+        self.cells = [False] * (height * width)
+        self.counts = [0] * (height * width)
+        for index in indexes:
+            self.mines.add(divmod(index, width))
+            self.cells[index] = True
+            for neighbor in neighbors[index]:
+                self.counts[neighbor] += 1
+        self.board = [self.cells[i * width:(i + 1) * width]
+                      for i in range(height)]
+
+    # Snapshot layout: magic, height and width, then bitmasks of the mines
+    # and of the mines found
+    SNAPSHOT = b"MSB1"
+
+    def to_bytes(self):
+        """
+        Returns a compact snapshot of the board, for from_bytes.
+        """
+        size = (self.height * self.width + 7) // 8
+        return (self.SNAPSHOT
+                + struct.pack("<HH", self.height, self.width)
+                + pack_cells(self.mines, self.width, size)
+                + pack_cells(self.mines_found, self.width, size))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Returns the board saved in a snapshot written by to_bytes.
+        """
+        if data[:4] != cls.SNAPSHOT:
+            raise ValueError("Not a Minesweeper snapshot")
+        height, width = struct.unpack_from("<HH", data, 4)
+        size = (height * width + 7) // 8
+        game = cls(height, width, 0)
+        mines = unpack_cells(data[8:8 + size], width)
+        game.place_mines(sorted(i * width + j for i, j in mines))
+        game.mines_found = unpack_cells(data[8 + size:8 + 2 * size], width)
+        return game
+
     def print(self):
         """
         Prints a text-based representation
@@ -50,7 +136,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return self.cells[i * self.width + j]
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +144,35 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return self.counts[i * self.width + j]
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+    def reveal(self, cell, revealed=()):
+        """
+        Returns the list of (cell, nearby mines) pairs uncovered by
+        choosing a safe cell: the cell itself and, if no mines are next
+        to it, every cell of the region of cells with no nearby mines
+        that it is in, along with that region's border. Cells in
+        `revealed` are not uncovered again.
+        """
+        width = self.width
+        neighbors = neighbor_table(self.height, width)
+        start = cell[0] * width + cell[1]
+        seen = {start}
+        frontier = [start]
+        uncovered = []
+        while frontier:
+            index = frontier.pop()
+            count = self.counts[index]
+            uncovered.append((divmod(index, width), count))
+            if count:
+                continue
+            for neighbor in neighbors[index]:
+                if neighbor not in seen \
+                        and divmod(neighbor, width) not in revealed:
+                    seen.add(neighbor)
+                    frontier.append(neighbor)
+        return uncovered
 
     def won(self):
         """
@@ -120,7 +217,7 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if cell in self.cells.copy():
+        if cell in self.cells:
             self.cells.remove(cell)
             self.count -= 1
 
@@ -129,21 +226,136 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell in self.cells.copy():
+        if cell in self.cells:
             self.cells.remove(cell)
 
 
+class MaskSentence():
+    """
+    Compact, immutable form of a Sentence for a board of a given width.
+    Cell (i, j) is bit i * width + j of an integer mask, so subset tests
+    and differences are bit operations, and sentences can be hashed.
+    """
+
+    __slots__ = ("mask", "count")
+
+    def __init__(self, mask, count):
+        object.__setattr__(self, "mask", mask)
+        object.__setattr__(self, "count", count)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MaskSentence is immutable")
+
+    def __eq__(self, other):
+        return (isinstance(other, MaskSentence)
+                and self.mask == other.mask and self.count == other.count)
+
+    def __hash__(self):
+        return hash((self.mask, self.count))
+
+    def __repr__(self):
+        return f"MaskSentence({bin(self.mask)}, {self.count})"
+
+    @classmethod
+    def from_sentence(cls, sentence, width):
+        """
+        Returns the compact form of a Sentence.
+        """
+        mask = 0
+        for i, j in sentence.cells:
+            mask |= 1 << (i * width + j)
+        return cls(mask, sentence.count)
+
+    def to_sentence(self, width):
+        """
+        Returns the sentence as a Sentence of (i, j) cells.
+        """
+        return Sentence((divmod(index, width) for index in self.indexes()),
+                        self.count)
+
+    def indexes(self):
+        """
+        Returns the list of cell indexes in the sentence.
+        """
+        indexes = []
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            indexes.append(low.bit_length() - 1)
+            mask ^= low
+        return indexes
+
+    def size(self):
+        """
+        Returns the number of cells in the sentence.
+        """
+        return bin(self.mask).count("1")
+
+    def issubset(self, other):
+        """
+        Returns True if every cell of this sentence is in `other`.
+        """
+        return self.mask & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of this sentence not in
+        `other`, a subset of it.
+        """
+        return MaskSentence(self.mask & ~other.mask, self.count - other.count)
+
+    def mark_mine(self, index):
+        """
+        Returns the sentence given that the cell at index is a mine.
+        """
+        bit = 1 << index
+        if self.mask & bit:
+            return MaskSentence(self.mask ^ bit, self.count - 1)
+        return self
+
+    def mark_safe(self, index):
+        """
+        Returns the sentence given that the cell at index is safe.
+        """
+        bit = 1 << index
+        if self.mask & bit:
+            return MaskSentence(self.mask ^ bit, self.count)
+        return self
+
+
+# What MinesweeperAI.known records about a cell
+SAFE = 1
+MINE = 2
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    # Mine density assumed when guessing without the total number of mines,
+    # that of the default 8x8 board with 8 mines
+    DENSITY = 0.125
+
+    # Largest frontier component the exact solver will enumerate, and the
+    # time in seconds it may spend after each move
+    SOLVER_CELLS = 64
+    SOLVER_BUDGET = 0.05
+
+    # Largest frontier component whose solutions are counted when
+    # guessing, and the time in seconds counting may take per guess
+    PROBABILITY_CELLS = 256
+    PROBABILITY_BUDGET = 0.05
+
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -151,8 +363,120 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # The same, by cell index: SAFE, MINE, or 0 if unknown
+        self.known = bytearray(height * width)
+        self.neighbor_table = neighbor_table(height, width)
+
+        # Safe cells in the order they were found, some of which may have
+        # been chosen since
+        self.pending = deque()
+
+        # Indexes of the cells not known to be safe or mines, in no order,
+        # and the position of each cell index in that list
+        self.unknown = list(range(height * width))
+        self.unknown_position = list(range(height * width))
+
+        # Sentences about the game known to be true, by id, as
+        # MaskSentences, with an index from each cell index (i * width + j)
+        # to the ids of the sentences containing it
+        self.sentences = dict()
+        self.cell_sentences = dict()
+        self.next_id = 0
+
+        # Every sentence in the knowledge base, to avoid duplicates
+        self.frozen = set()
+
+        # Ids of sentences that changed and need to be re-examined
+        self.worklist = []
+
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true.
+        """
+        return [sentence.to_sentence(self.width)
+                for sentence in self.sentences.values()]
+
+    # Snapshot layout: magic, height, width and total mines (-1 if not
+    # known), bitmasks of the moves made, mines and safes, then counted
+    # lists of the pending safe cells, the unknown cells in order and the
+    # sentences, each a bitmask and a count
+    SNAPSHOT = b"MSA1"
+
+    def to_bytes(self):
+        """
+        Returns a compact snapshot of everything the AI knows, for
+        from_bytes.
+        """
+        width = self.width
+        size = (self.height * width + 7) // 8
+        total = -1 if self.total_mines is None else self.total_mines
+        pending = [i * width + j for i, j in self.pending
+                   if (i, j) not in self.moves_made]
+        parts = [
+            self.SNAPSHOT,
+            struct.pack("<HHi", self.height, width, total),
+            pack_cells(self.moves_made, width, size),
+            pack_cells(self.mines, width, size),
+            pack_cells(self.safes, width, size),
+            struct.pack(f"<I{len(pending)}I", len(pending), *pending),
+            struct.pack(f"<I{len(self.unknown)}I", len(self.unknown),
+                        *self.unknown),
+            struct.pack("<I", len(self.sentences))
+        ]
+        for sentence in self.sentences.values():
+            parts.append(sentence.mask.to_bytes(size, "little"))
+            parts.append(struct.pack("<H", sentence.count))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Returns an AI in the state saved in a snapshot written by
+        to_bytes.
+        """
+        if data[:4] != cls.SNAPSHOT:
+            raise ValueError("Not a MinesweeperAI snapshot")
+        height, width, total = struct.unpack_from("<HHi", data, 4)
+        ai = cls(height, width, None if total < 0 else total)
+        size = (height * width + 7) // 8
+        offset = 12
+
+        def cells():
+            nonlocal offset
+            offset += size
+            return unpack_cells(data[offset - size:offset], width)
+
+        def indexes():
+            nonlocal offset
+            count, = struct.unpack_from("<I", data, offset)
+            start = offset + 4
+            offset = start + 4 * count
+            return list(struct.unpack_from(f"<{count}I", data, start))
+
+        ai.moves_made = cells()
+        ai.mines = cells()
+        ai.safes = cells()
+        for i, j in ai.safes:
+            ai.known[i * width + j] = SAFE
+        for i, j in ai.mines:
+            ai.known[i * width + j] = MINE
+        ai.pending = deque(divmod(index, width) for index in indexes())
+        ai.unknown = indexes()
+        for position, index in enumerate(ai.unknown):
+            ai.unknown_position[index] = position
+
+        count, = struct.unpack_from("<I", data, offset)
+        offset += 4
+        for _ in range(count):
+            mask = int.from_bytes(data[offset:offset + size], "little")
+            mines, = struct.unpack_from("<H", data, offset + size)
+            offset += size + 2
+            ai.add_sentence(MaskSentence(mask, mines))
+
+        # The saved knowledge already has every conclusion drawn from it
+        ai.worklist.clear()
+        return ai
 
     def mark_mine(self, cell):
         """
@@ -160,8 +484,12 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        index = cell[0] * self.width + cell[1]
+        if not self.known[index]:
+            self.discard_unknown(index)
+        self.known[index] = MINE
+        for sentence_id in self.cell_sentences.pop(index, ()):
+            self.update_sentence(sentence_id, MaskSentence.mark_mine, index)
 
     def mark_safe(self, cell):
         """
@@ -169,8 +497,127 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        index = cell[0] * self.width + cell[1]
+        if not self.known[index]:
+            self.discard_unknown(index)
+            if cell not in self.moves_made:
+                self.pending.append(cell)
+        self.known[index] = SAFE
+        for sentence_id in self.cell_sentences.pop(index, ()):
+            self.update_sentence(sentence_id, MaskSentence.mark_safe, index)
+
+    def discard_unknown(self, index):
+        """
+        Removes a cell index from the list of unknown cells, by moving
+        the last one into its place.
+        """
+        position = self.unknown_position[index]
+        last = self.unknown.pop()
+        if last != index:
+            self.unknown[position] = last
+            self.unknown_position[last] = position
+
+    def add_sentence(self, sentence):
+        """
+        Adds a MaskSentence to the knowledge base and queues it for
+        inference, unless it is empty or already known.
+        """
+        if not sentence.mask or sentence in self.frozen:
+            return
+        self.frozen.add(sentence)
+        sentence_id = self.next_id
+        self.next_id += 1
+        self.sentences[sentence_id] = sentence
+        for index in sentence.indexes():
+            self.cell_sentences.setdefault(index, set()).add(sentence_id)
+        self.worklist.append(sentence_id)
+
+    def remove_sentence(self, sentence_id):
+        """
+        Removes a sentence from the knowledge base and its index.
+        """
+        sentence = self.sentences.pop(sentence_id)
+        self.frozen.discard(sentence)
+        for index in sentence.indexes():
+            ids = self.cell_sentences.get(index)
+            if ids is not None:
+                ids.discard(sentence_id)
+                if not ids:
+                    del self.cell_sentences[index]
+
+    def update_sentence(self, sentence_id, update, index):
+        """
+        Replaces a sentence by the result of `update` (mark_mine or
+        mark_safe) for the cell at index, whose index entry is already
+        gone. Drops it if it became empty or a duplicate, or else queues
+        it for inference.
+        """
+        sentence = self.sentences.get(sentence_id)
+        if sentence is None:
+            return
+        updated = update(sentence, index)
+        if not updated.mask or updated in self.frozen:
+            self.remove_sentence(sentence_id)
+            return
+        self.frozen.discard(sentence)
+        self.frozen.add(updated)
+        self.sentences[sentence_id] = updated
+        self.worklist.append(sentence_id)
+
+    def infer(self):
+        """
+        Draws conclusions from the queued sentences until nothing new
+        follows: marks the cells of sentences with no mines as safe and
+        of sentences with only mines as mines, and replaces any sentence
+        that contains another with the difference of the two. Only
+        sentences sharing a cell with a changed sentence are compared.
+        """
+        while self.worklist:
+            sentence_id = self.worklist.pop()
+            sentence = self.sentences.get(sentence_id)
+            if sentence is None:
+                continue
+
+            indexes = sentence.indexes()
+            if sentence.count == 0:
+                for index in indexes:
+                    self.mark_safe(divmod(index, self.width))
+                continue
+            if len(indexes) == sentence.count:
+                for index in indexes:
+                    self.mark_mine(divmod(index, self.width))
+                continue
+
+            # Sentences overlapping this one
+            others = set()
+            for index in indexes:
+                others |= self.cell_sentences.get(index, set())
+            others.discard(sentence_id)
+
+            for other_id in others:
+                other = self.sentences.get(other_id)
+                if other is None or other.mask == sentence.mask:
+                    continue
+                if sentence.issubset(other):
+                    superset_id, superset, subset = other_id, other, sentence
+                elif other.issubset(sentence):
+                    superset_id, superset, subset = sentence_id, sentence, other
+                else:
+                    continue
+
+                # The superset's other cells hold the remaining mines
+                self.remove_sentence(superset_id)
+                self.add_sentence(superset.difference(subset))
+                if superset_id == sentence_id:
+                    break
+
+    def neighbors(self, cell):
+        """
+        Returns the cells within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return [divmod(index, self.width) for index in
+                self.neighbor_table[cell[0] * self.width + cell[1]]]
 
     def add_knowledge(self, cell, count):
         """
@@ -186,67 +633,132 @@ class MinesweeperAI():
                if it can be concluded based on the AI's knowledge base
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
-        """        
-        self.moves_made.add(cell)
-        self.mark_safe(cell)
-        
-        cells_to_add = set()
-        cells_to_add.add((cell[0]+1, cell[1]+1))
-        cells_to_add.add((cell[0]+1, cell[1]+0))
-        cells_to_add.add((cell[0]+1, cell[1]-1))
-        cells_to_add.add((cell[0]+0, cell[1]-1))
-        cells_to_add.add((cell[0]-1, cell[1]-1))
-        cells_to_add.add((cell[0]-1, cell[1]+0))
-        cells_to_add.add((cell[0]-1, cell[1]+1))
-        cells_to_add.add((cell[0]+0, cell[1]+1))
-        for cell_check in cells_to_add.copy():
-            if cell_check[0] < 0 or cell_check[0] >= self.height or cell_check[1] < 0 or cell_check[1] >= self.width:
-                cells_to_add.remove(cell_check)
-        
-        for cell_check in cells_to_add.copy():
-            if cell_check in self.mines or cell_check in self.safes:
-                cells_to_add.remove(cell_check)
-            if cell_check in self.mines:
-                count -= 1
-                
-        
-        
-        new_sentence = Sentence(cells_to_add, count)
-        self.knowledge.append(new_sentence)
-        
-        #now, check each sentence to see if it is a subset of another sentence. If so remove the subset from the superset, and reduce the superset count by the subset count
-        for sentence1 in self.knowledge.copy():
-            for sentence2 in self.knowledge.copy():
-                if not sentence1 == sentence2:
-                    if sentence1.cells.issubset(sentence2.cells) and not len(sentence1.cells) == 0:
-                        add_sentence_cells = sentence2.cells - sentence1.cells
-                        add_sentence_count = abs(sentence2.count - sentence1.count)
-                        add_sentence = Sentence(add_sentence_cells, add_sentence_count)
-                        if not len(add_sentence.cells) == 0:
-                            self.knowledge.append(add_sentence)
-                        self.knowledge.remove(sentence2)
-                        # print(f"Reformed Sentence: {add_sentence}")
-                        # if len(add_sentence_cells) == 0 and add_sentence_count > 0:
-                        #     print(f"Sentence cells empty\n Source Sentences->\nSentence 1: {sentence1}\nSentence 2: {sentence2}")
-                        
-                        
-        #check whole knowledge to see if there are any safes or mines that we can a to self.mine/safes
-        for sentence in self.knowledge:
-            if sentence.known_mines():
-                for mine in sentence.known_mines().copy():
-                    # self.mines.add(mine)
-                    self.mark_mine(mine)
-            if sentence.known_safes():
-                # print(f"Adding safes: {sentence}")
-                for safe in sentence.known_safes().copy():
-                    # self.safes.add(safe)
-                    self.mark_safe(safe)
-                    
-        
-        # print(f"Selected Cell: {cell},  New Sentence: {new_sentence}")
-        # for i in cells_to_add:
-        #     print(i)
-        # raise NotImplementedError
+        """
+        self.add_knowledge_batch([(cell, count)])
+
+    def add_knowledge_batch(self, facts):
+        """
+        Does the same as add_knowledge for each (cell, count) pair in
+        `facts`, such as all the cells uncovered by Minesweeper.reveal,
+        but draws conclusions only once, after all of them are added.
+        """
+        for cell, _ in facts:
+            self.moves_made.add(cell)
+            self.mark_safe(cell)
+
+        # Only cells not already known to be safe or mines are unknown
+        known = self.known
+        for cell, count in facts:
+            mask = 0
+            for index in self.neighbor_table[cell[0] * self.width + cell[1]]:
+                if known[index] == MINE:
+                    count -= 1
+                elif not known[index]:
+                    mask |= 1 << index
+            self.add_sentence(MaskSentence(mask, count))
+
+        self.infer()
+        if self.make_safe_move() is None:
+            self.solve()
+
+    def deduce(self, cells, sentences, deadline):
+        """
+        Enumerates every placement of mines in `cells` consistent with
+        the sentences, which must only mention those cells, by
+        backtracking over bitsets with bit i standing for cells[i].
+
+        Returns (mines, safes), the masks of the cells that are a mine in
+        every solution and in none, or None if there is no solution or
+        the deadline passes first.
+        """
+        n = len(cells)
+        position = {index: i for i, index in enumerate(cells)}
+        constraints = []
+        cell_constraints = [[] for _ in range(n)]
+        for sentence in sentences:
+            mask = 0
+            for index in sentence.indexes():
+                mask |= 1 << position[index]
+            for i in sentence.indexes():
+                cell_constraints[position[i]].append(len(constraints))
+            constraints.append((mask, sentence.count))
+
+        limit = n
+        if self.total_mines is not None:
+            limit = self.total_mines - len(self.mines)
+
+        full = (1 << n) - 1
+        always = full
+        ever = 0
+        stack = [(0, 0, 0)]
+        steps = 0
+        while stack:
+            i, mines, assigned = stack.pop()
+            if i == n:
+                always &= mines
+                ever |= mines
+                if not always and ever == full:
+                    break
+                continue
+
+            steps += 1
+            if steps % 1024 == 0 and time.perf_counter() > deadline:
+                return None
+
+            bit = 1 << i
+            assigned |= bit
+            for mine in (0, bit):
+                placed = mines | mine
+                if mine and bin(placed).count("1") > limit:
+                    continue
+                for c in cell_constraints[i]:
+                    mask, count = constraints[c]
+                    known = bin(placed & mask).count("1")
+                    if known > count or \
+                            known + bin(mask & ~assigned).count("1") < count:
+                        break
+                else:
+                    stack.append((i + 1, placed, assigned))
+
+        if not ever and always == full:
+            return None
+        return always, full & ~ever
+
+    def solve(self):
+        """
+        Marks every frontier cell that is a mine, or safe, in all the
+        placements of mines consistent with the knowledge, including
+        those that need several sentences at once to see, and repeats
+        while that leads to new conclusions.
+
+        Components larger than SOLVER_CELLS are skipped, and solving
+        stops once SOLVER_BUDGET seconds have passed.
+        """
+        deadline = time.perf_counter() + self.SOLVER_BUDGET
+        while True:
+            mines = []
+            safes = []
+            for cells, sentences in self.components():
+                if len(cells) > self.SOLVER_CELLS:
+                    continue
+                result = self.deduce(cells, sentences, deadline)
+                if result is None:
+                    continue
+                always, never = result
+                for i, index in enumerate(cells):
+                    if always >> i & 1:
+                        mines.append(divmod(index, self.width))
+                    elif never >> i & 1:
+                        safes.append(divmod(index, self.width))
+            if not mines and not safes:
+                return
+            for cell in mines:
+                self.mark_mine(cell)
+            for cell in safes:
+                self.mark_safe(cell)
+            self.infer()
+            if time.perf_counter() > deadline:
+                return
 
     def make_safe_move(self):
         """
@@ -257,10 +769,10 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for safe_move in self.safes:
-            if not safe_move in self.moves_made:
-                return safe_move
-        return None
+        pending = self.pending
+        while pending and pending[0] in self.moves_made:
+            pending.popleft()
+        return pending[0] if pending else None
 
     def make_random_move(self):
         """
@@ -268,24 +780,250 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        Cells not yet known to be safe are chosen from first, and a
+        known safe cell only when no others are left.
         """
-        random_moves = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                random_moves.add((i,j))
-        
-        for move in self.moves_made:
-            if move in random_moves.copy():
-                random_moves.remove(move)
-        for mine in self.mines:
-            if mine in random_moves.copy():
-                random_moves.remove(mine)
-                
-        if len(random_moves) == 0:
+        if self.unknown:
+            return divmod(random.choice(self.unknown), self.width)
+        return self.make_safe_move()
+
+    def components(self):
+        """
+        Splits the frontier, the unknown cells in some sentence, into
+        groups of cells that share no sentences with each other, and
+        returns a list of (cell indexes, sentences) pairs.
+        """
+        components = []
+        seen = set()
+        for start in self.cell_sentences:
+            if start in seen:
+                continue
+            seen.add(start)
+            cells = [start]
+            sentence_ids = set()
+            for index in cells:
+                for sentence_id in self.cell_sentences[index]:
+                    if sentence_id in sentence_ids:
+                        continue
+                    sentence_ids.add(sentence_id)
+                    for other in self.sentences[sentence_id].indexes():
+                        if other not in seen:
+                            seen.add(other)
+                            cells.append(other)
+            components.append((cells, [self.sentences[sentence_id]
+                                       for sentence_id in sentence_ids]))
+        return components
+
+    def count_solutions(self, cells, sentences, deadline=None):
+        """
+        Counts the ways to place mines in `cells` consistent with every
+        sentence, which must only mention those cells.
+
+        Returns a dict from each number of mines k to a pair: the number
+        of solutions with k mines, and a list of how many of those
+        solutions have a mine in each of `cells`. Returns None if the
+        deadline passes first.
+        """
+        n = len(cells)
+        position = {index: i for i, index in enumerate(cells)}
+
+        # The sentences each cell is in, and how many of each sentence's
+        # cells come after each cell
+        cell_constraints = [[] for _ in range(n)]
+        remaining = []
+        first = []
+        for c, sentence in enumerate(sentences):
+            positions = sorted(position[index] for index in sentence.indexes())
+            for i in positions:
+                cell_constraints[i].append(c)
+            remaining.append({i: len(positions) - 1 - r
+                              for r, i in enumerate(positions)})
+            first.append(positions[0])
+
+        # States between cells i - 1 and i are the mines still needed by
+        # the open sentences, those with cells on both sides, in order
+        last = [max(r) for r in remaining]
+        open_sentences = [[] for _ in range(n + 1)]
+        for c in range(len(sentences)):
+            for i in range(first[c] + 1, last[c] + 1):
+                open_sentences[i].append(c)
+
+        def successors(i, state):
+            # Yields (mine, next state) for each way to fill cells[i]
+            # from `state`
+            needs = dict(zip(open_sentences[i], state))
+            for mine in (0, 1):
+                updated = dict(needs)
+                for c in cell_constraints[i]:
+                    need = updated.get(c, sentences[c].count) - mine
+                    if not 0 <= need <= remaining[c][i]:
+                        break
+                    updated[c] = need
+                else:
+                    yield mine, tuple(updated[c]
+                                      for c in open_sentences[i + 1])
+
+        # Left to right: the ways to fill cells[:i] reaching each state,
+        # by number of mines
+        forward = [{(): {0: 1}}]
+        for i in range(n):
+            layer = {}
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            for state, ways_by_k in forward[i].items():
+                for mine, following in successors(i, state):
+                    ways = layer.setdefault(following, {})
+                    for k, count in ways_by_k.items():
+                        ways[k + mine] = ways.get(k + mine, 0) + count
+            forward.append(layer)
+
+        # Right to left: the ways to fill cells[i:] from each reachable
+        # state, and for each cell the solutions with a mine there
+        backward = {(): {0: 1}} if () in forward[n] else {}
+        mines = [None] * n
+        for i in reversed(range(n)):
+            layer = {}
+            with_mine = {}
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            for state, ways_by_k in forward[i].items():
+                for mine, following in successors(i, state):
+                    rest = backward.get(following)
+                    if rest is None:
+                        continue
+                    ways = layer.setdefault(state, {})
+                    for k, count in rest.items():
+                        ways[k + mine] = ways.get(k + mine, 0) + count
+                    if mine:
+                        for k, count in rest.items():
+                            for j, before in ways_by_k.items():
+                                with_mine[j + k + 1] = \
+                                    with_mine.get(j + k + 1, 0) \
+                                    + before * count
+            backward = layer
+            mines[i] = with_mine
+
+        return {k: (ways, [counts.get(k, 0) for counts in mines])
+                for k, ways in backward.get((), {}).items()}
+
+    def mine_probabilities(self):
+        """
+        Returns a dict from each unknown cell on the frontier to the
+        probability that it is a mine, and the probability for any
+        other unknown cell, or None if there are no others.
+
+        Every solution of each frontier component is counted, and
+        solutions are weighted by the ways to place the rest of the
+        mines in the other unknown cells, so that all the arrangements
+        of the board consistent with the knowledge are equally likely.
+
+        Components larger than PROBABILITY_CELLS, and those not counted
+        within PROBABILITY_BUDGET seconds, are treated like the other
+        unknown cells, and given the same probability.
+        """
+        deadline = time.perf_counter() + self.PROBABILITY_BUDGET
+        components = []
+        skipped = []
+        for cells, sentences in self.components():
+            solutions = None
+            if len(cells) <= self.PROBABILITY_CELLS:
+                solutions = self.count_solutions(cells, sentences, deadline)
+            if solutions is None:
+                skipped.extend(cells)
+            else:
+                components.append((cells, solutions))
+        frontier = sum(len(cells) for cells, _ in components)
+        interior = len(self.unknown) - frontier
+
+        # Weight of a solution placing k mines on the frontier
+        if self.total_mines is None:
+            # Exact, so that the result does not depend on summation order
+            ratio = Fraction(self.DENSITY) / (1 - Fraction(self.DENSITY))
+
+            def weight(k):
+                return ratio ** k
+        else:
+            left = self.total_mines - len(self.mines)
+
+            def weight(k):
+                if 0 <= left - k <= interior:
+                    return math.comb(interior, left - k)
+                return 0
+
+        # Distribution of the number of frontier mines over the components
+        # before and after each one, by convolution
+        def convolve(a, b):
+            c = {}
+            for i, x in a.items():
+                for j, y in b.items():
+                    c[i + j] = c.get(i + j, 0) + x * y
+            return c
+
+        totals = [{k: ways for k, (ways, _) in solutions.items()}
+                  for _, solutions in components]
+        before = [{0: 1}]
+        for total in totals:
+            before.append(convolve(before[-1], total))
+        after = [{0: 1}]
+        for total in reversed(totals):
+            after.append(convolve(after[-1], total))
+        after.reverse()
+
+        everything = before[-1]
+        norm = sum(ways * weight(k) for k, ways in everything.items())
+        if not norm:
+            # Knowledge and mine count disagree; fall back to no weighting
+            def weight(k):
+                return 1
+            norm = sum(everything.values())
+
+        probabilities = {}
+        for c, (cells, solutions) in enumerate(components):
+            others = convolve(before[c], after[c + 1])
+            mines = [0] * len(cells)
+            for k, (_, counts) in solutions.items():
+                factor = sum(ways * weight(k + j) for j, ways in others.items())
+                if factor:
+                    for i, count in enumerate(counts):
+                        mines[i] += count * factor
+            for index, count in zip(cells, mines):
+                probabilities[divmod(index, self.width)] = float(count / norm)
+
+        if not interior:
+            return probabilities, None
+        if self.total_mines is None:
+            estimate = self.DENSITY
+        else:
+            expected = sum(ways * weight(k) * (left - k)
+                           for k, ways in everything.items())
+            estimate = float(expected / norm / interior)
+        for index in skipped:
+            probabilities[divmod(index, self.width)] = estimate
+        if interior == len(skipped):
+            return probabilities, None
+        return probabilities, estimate
+
+    def make_guess_move(self):
+        """
+        Returns a move to make on the Minesweeper board when no move is
+        known to be safe: a cell that has not already been chosen and is
+        the least likely of all such cells to be a mine.
+        """
+        move = self.make_safe_move()
+        if move is not None:
+            return move
+
+        probabilities, other = self.mine_probabilities()
+        chances = list(probabilities.values())
+        if other is not None:
+            chances.append(other)
+        if not chances:
             return None
-        random_list = list(random_moves)
-        max_rand = len(random_list)
-        index = random.randint(0, max_rand)
-        return random_list[index]
-        
-        
+        best = min(chances)
+
+        # Break ties randomly, between frontier and other cells alike
+        moves = sorted(cell for cell, p in probabilities.items() if p == best)
+        if other == best:
+            moves.extend(divmod(index, self.width) for index in self.unknown
+                         if index not in self.cell_sentences)
+        return random.choice(moves)
@@ -0,0 +1,215 @@
+import itertools
+import math
+import random
+import sys
+
+from minesweeper import Minesweeper, MinesweeperAI, MaskSentence
+
+
+def play(seed, height=8, width=8, mines=10):
+    """
+    Plays a seeded game, guessing at random when no move is known to be
+    safe, and yields the board and the AI after each move.
+    """
+    random.seed(f"guesses {seed}")
+    game = Minesweeper(height=height, width=width, mines=mines, seed=seed)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    while len(ai.moves_made) < height * width - mines:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            return
+        ai.add_knowledge_batch(game.reveal(move, ai.moves_made))
+        yield game, ai
+
+
+def test_knowledge_matches_board():
+    for seed in range(40):
+        for game, ai in play(seed):
+            assert ai.mines <= game.mines
+            assert not ai.safes & game.mines
+            for sentence in ai.knowledge:
+                assert sentence.cells
+                assert not sentence.cells & (ai.mines | ai.safes)
+                assert len(sentence.cells & game.mines) == sentence.count
+
+
+def test_duplicate_sentences_rejected():
+    for seed in range(10):
+        for _, ai in play(seed):
+            sentences = list(ai.sentences.values())
+            assert len(set(sentences)) == len(sentences)
+            assert ai.frozen == set(sentences)
+
+    ai = MinesweeperAI(height=3, width=3)
+    ai.add_sentence(MaskSentence(0b11, 1))
+    ai.add_sentence(MaskSentence(0b11, 1))
+    ai.add_sentence(MaskSentence(0, 0))
+    assert list(ai.sentences.values()) == [MaskSentence(0b11, 1)]
+    assert ai.cell_sentences == {0: {0}, 1: {0}}
+
+
+def brute_force_probabilities(ai):
+    """
+    Returns the probability that each unknown cell is a mine, over every
+    placement of the remaining mines consistent with the knowledge.
+    """
+    unknown = sorted(ai.unknown)
+    left = ai.total_mines - len(ai.mines)
+    sentences = list(ai.sentences.values())
+    mines = dict.fromkeys(unknown, 0)
+    total = 0
+    for placement in itertools.combinations(unknown, left):
+        mask = sum(1 << index for index in placement)
+        if all(bin(mask & sentence.mask).count("1") == sentence.count
+               for sentence in sentences):
+            total += 1
+            for index in placement:
+                mines[index] += 1
+    return {divmod(index, ai.width): count / total
+            for index, count in mines.items()}
+
+
+def test_mine_probabilities_match_enumeration():
+    checked = 0
+    for seed in range(20):
+        for _, ai in play(seed, height=5, width=5, mines=5):
+            if not ai.unknown:
+                continue
+            probabilities, other = ai.mine_probabilities()
+            expected = brute_force_probabilities(ai)
+            for cell, p in expected.items():
+                if cell in probabilities:
+                    assert math.isclose(probabilities[cell], p)
+                else:
+                    assert math.isclose(other, p)
+                checked += 1
+    assert checked > 500
+
+
+def test_count_solutions_match_enumeration():
+    for seed in range(30):
+        for _, ai in play(seed, height=5, width=5, mines=5):
+            for cells, sentences in ai.components():
+                expected = {}
+                for mines in itertools.product((0, 1), repeat=len(cells)):
+                    mask = sum(1 << index
+                               for index, mine in zip(cells, mines) if mine)
+                    if all(bin(mask & sentence.mask).count("1")
+                           == sentence.count for sentence in sentences):
+                        ways, counts = expected.get(sum(mines),
+                                                    (0, [0] * len(cells)))
+                        expected[sum(mines)] = (
+                            ways + 1, [a + b for a, b in zip(counts, mines)])
+                assert ai.count_solutions(cells, sentences) == expected
+
+
+def test_count_solutions_long_component():
+    # A chain of pairs of cells holding one mine each, longer than the
+    # recursion limit, has two solutions, alternating mines and safes
+    n = sys.getrecursionlimit() + 500
+    n += n % 2
+    ai = MinesweeperAI(height=1, width=n)
+    sentences = [MaskSentence(0b11 << j, 1) for j in range(n - 1)]
+    solutions = ai.count_solutions(list(range(n)), sentences)
+    assert solutions == {n // 2: (2, [1] * n)}
+    assert ai.count_solutions(list(range(n)), sentences, deadline=0) is None
+
+
+def test_guess_on_long_frontier():
+    # Counts of 1 along the uncovered bottom row of a long 2-row board
+    width = sys.getrecursionlimit() + 200
+    ai = MinesweeperAI(height=2, width=width)
+    for j in range(width):
+        ai.moves_made.add((1, j))
+        ai.mark_safe((1, j))
+    for j in range(1, width - 1):
+        ai.add_sentence(MaskSentence(0b111 << (j - 1), 1))
+
+    probabilities, other = ai.mine_probabilities()
+    assert other is None
+    assert set(probabilities.values()) == {ai.DENSITY}
+    assert ai.make_guess_move() in probabilities
+
+
+def one_two_one():
+    """
+    Returns an AI that knows the counts 1, 2 and 1 of the middle three
+    cells of the uncovered bottom row of a 2x5 board, from which only
+    all three together place mines in the second and fourth cells of
+    the top row.
+    """
+    ai = MinesweeperAI(height=2, width=5)
+    for j in range(5):
+        ai.moves_made.add((1, j))
+        ai.mark_safe((1, j))
+    ai.add_sentence(MaskSentence(0b00111, 1))
+    ai.add_sentence(MaskSentence(0b01110, 2))
+    ai.add_sentence(MaskSentence(0b11100, 1))
+    return ai
+
+
+def test_solve_beyond_subset_inference():
+    ai = one_two_one()
+    ai.infer()
+    assert not ai.mines
+    assert ai.make_safe_move() is None
+
+    ai.solve()
+    assert ai.mines == {(0, 1), (0, 3)}
+    assert {(0, 0), (0, 2), (0, 4)} <= ai.safes
+    assert not ai.sentences
+
+
+def test_solve_skips_large_components():
+    ai = one_two_one()
+    ai.SOLVER_CELLS = 4
+    ai.infer()
+    ai.solve()
+    assert not ai.mines
+    assert ai.make_safe_move() is None
+    assert len(ai.sentences) == 3
+
+
+def sentences(ai):
+    """Returns the AI's knowledge as a sorted list of (cells, count)."""
+    return sorted((sorted(sentence.cells), sentence.count)
+                  for sentence in ai.knowledge)
+
+
+def test_ai_snapshot_round_trip():
+    for seed in range(20):
+        for _, ai in play(seed, height=9, width=9, mines=10):
+            loaded = MinesweeperAI.from_bytes(ai.to_bytes())
+            assert (loaded.height, loaded.width, loaded.total_mines) == \
+                (ai.height, ai.width, ai.total_mines)
+            assert sentences(loaded) == sentences(ai)
+            assert loaded.mines == ai.mines
+            assert loaded.safes == ai.safes
+            assert loaded.moves_made == ai.moves_made
+            assert loaded.unknown == ai.unknown
+            assert list(loaded.pending) == [cell for cell in ai.pending
+                                            if cell not in ai.moves_made]
+
+            # Both pick the same move from the same random state
+            assert loaded.make_safe_move() == ai.make_safe_move()
+            for guess in (MinesweeperAI.make_random_move,
+                          MinesweeperAI.make_guess_move):
+                state = random.getstate()
+                move = guess(ai)
+                random.setstate(state)
+                assert guess(loaded) == move
+
+
+def test_board_snapshot_round_trip():
+    for seed in range(20):
+        game = Minesweeper(height=7, width=11, mines=12, seed=seed)
+        game.mines_found = set(random.Random(seed).sample(sorted(game.mines),
+                                                          5))
+        loaded = Minesweeper.from_bytes(game.to_bytes())
+        assert (loaded.height, loaded.width) == (7, 11)
+        assert loaded.mines == game.mines
+        assert loaded.mines_found == game.mines_found
+        assert loaded.board == game.board
+        assert loaded.counts == game.counts
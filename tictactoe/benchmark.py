@@ -0,0 +1,288 @@
+"""
+Tic Tac Toe AI benchmark
+
+Times each engine on a fixed set of positions with cold caches, reports
+nodes searched, nodes/sec, cache hit rate and time-to-move, and checks
+that every engine's move is as good as the reference minimax move, both
+there and on every reachable position with caches kept warm.
+
+Usage: python benchmark.py [--json results.json] [--repeat N]
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+import bitboard
+import mnk
+import solve
+import tictactoe as ttt
+
+X = ttt.X
+O = ttt.O
+EMPTY = ttt.EMPTY
+
+# Named positions to benchmark, all with the game still in progress
+POSITIONS = {
+    "empty": [[EMPTY, EMPTY, EMPTY],
+              [EMPTY, EMPTY, EMPTY],
+              [EMPTY, EMPTY, EMPTY]],
+    "corner": [[X, EMPTY, EMPTY],
+               [EMPTY, EMPTY, EMPTY],
+               [EMPTY, EMPTY, EMPTY]],
+    "center reply": [[X, EMPTY, EMPTY],
+                     [EMPTY, O, EMPTY],
+                     [EMPTY, EMPTY, EMPTY]],
+    "block": [[X, EMPTY, EMPTY],
+              [X, O, EMPTY],
+              [EMPTY, EMPTY, EMPTY]],
+    "fork": [[X, EMPTY, EMPTY],
+             [X, O, EMPTY],
+             [O, EMPTY, EMPTY]],
+    "win": [[X, EMPTY, X],
+            [X, O, EMPTY],
+            [O, EMPTY, EMPTY]]
+}
+
+
+class Counter():
+    """
+    Counts calls to a cached search function, and how many of them were
+    answered from its cache, by temporarily wrapping it in its module.
+    """
+
+    def __init__(self, module, name, cached):
+        self.module = module
+        self.name = name
+        self.cached = cached
+        self.nodes = 0
+        self.hits = 0
+
+    def __enter__(self):
+        original = getattr(self.module, self.name)
+        self.original = original
+
+        def wrapper(*args):
+            self.nodes += 1
+            if self.cached is not None and self.cached(*args):
+                self.hits += 1
+            return original(*args)
+
+        setattr(self.module, self.name, wrapper)
+        return self
+
+    def __exit__(self, *exc):
+        setattr(self.module, self.name, self.original)
+        return False
+
+
+def reset():
+    """Clears every engine's caches so that each run starts cold."""
+    ttt.transpositions.clear()
+    ttt.bounds.clear()
+    ttt.killers.clear()
+    ttt.history.clear()
+    ttt.book = None
+    bitboard.values.clear()
+
+
+def book_move(board):
+    """Returns the move read from the solution table."""
+    ttt.book = BOOK
+    return ttt.minimax(board)
+
+
+def mnk_move(board):
+    """Returns the move found by a fresh m,n,k engine searching fully."""
+    return mnk.Game().best_move(board, math.inf)
+
+
+def count_minimax(board):
+    with Counter(ttt, "cells_value",
+                 lambda cells, lines:
+                 ttt.canonical_code(cells)[0] in ttt.transpositions) as c:
+        move = ttt.minimax(board)
+    return move, c.nodes, c.hits, c.nodes
+
+
+def count_alphabeta(board):
+    def cached(cells, lines, alpha, beta):
+        # Answered from the tables: an exact value, or bounds that leave
+        # nothing of the window to search
+        key = ttt.canonical_code(cells)[0]
+        if key in ttt.transpositions:
+            return True
+        lower, upper = ttt.bounds.get(key, (-1, 1))
+        return max(alpha, lower) >= min(beta, upper)
+
+    with Counter(ttt, "alphabeta_cells", cached) as c:
+        move = ttt.alphabeta(board)
+    return move, c.nodes, c.hits, c.nodes
+
+
+def count_bitboard(board):
+    def cached(x, o):
+        cx, co, _ = bitboard.canonical(x, o)
+        return (cx, co) in bitboard.values
+
+    with Counter(bitboard, "value", cached) as c:
+        move = bitboard.best_action(board)
+    return move, c.nodes, c.hits, c.nodes
+
+
+def count_mnk(board):
+    game = mnk.Game()
+    move = game.best_move(board, math.inf)
+    return move, game.nodes, game.hits, game.probes
+
+
+def count_book(board):
+    code, _ = ttt.canonical(board)
+    return book_move(board), 1, 1 if BOOK[code] else 0, 1
+
+
+# Each engine's move function, and a function returning (move, nodes,
+# cache hits, cache probes) from an instrumented run
+ENGINES = {
+    "minimax": (ttt.minimax, count_minimax),
+    "alphabeta": (ttt.alphabeta, count_alphabeta),
+    "bitboard": (bitboard.best_action, count_bitboard),
+    "mnk": (mnk_move, count_mnk),
+    "book": (book_move, count_book)
+}
+
+# Solution table for the book engine, built once up front
+BOOK = solve.solve()
+
+
+def benchmark(repeat=3):
+    """
+    Returns a list of result dicts, one per engine and position, and the
+    number of moves that disagreed with the reference minimax values.
+    """
+    results = []
+    disagreements = 0
+    for name, board in POSITIONS.items():
+
+        # Reference: the value of the move minimax chooses
+        reset()
+        reference = ttt.value(ttt.result(board, ttt.minimax(board)))
+
+        for engine, (move_function, count) in ENGINES.items():
+
+            # Time with no instrumentation, best of `repeat` cold runs
+            seconds = math.inf
+            for _ in range(repeat):
+                reset()
+                start = time.perf_counter()
+                move_function(board)
+                seconds = min(seconds, time.perf_counter() - start)
+
+            # Count nodes and cache hits in a separate instrumented run
+            reset()
+            move, nodes, hits, probes = count(board)
+
+            reset()
+            agrees = ttt.value(ttt.result(board, move)) == reference
+            disagreements += not agrees
+            results.append({
+                "position": name,
+                "engine": engine,
+                "move": list(move),
+                "agrees": agrees,
+                "seconds": seconds,
+                "nodes": nodes,
+                "nodes_per_second": nodes / seconds if seconds else None,
+                "cache_hit_rate": hits / probes if probes else None
+            })
+    return results, disagreements
+
+
+def reachable_positions():
+    """Returns every board in progress reachable from the empty board."""
+    positions = []
+    seen = set()
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        key = str(board)
+        if key in seen or ttt.terminal(board):
+            continue
+        seen.add(key)
+        positions.append(board)
+        frontier.extend(ttt.result(board, action)
+                        for action in ttt.actions(board))
+    return positions
+
+
+def warm_pass():
+    """
+    Plays each engine on every reachable position in turn, keeping its
+    caches from one position to the next, and returns the number of
+    moves that disagreed with the reference minimax values.
+    """
+    positions = reachable_positions()
+
+    # Reference values, worked out before any engine fills the tables
+    reset()
+    values = {}
+    for board in positions:
+        values[str(board)] = ttt.value(board)
+        for action in ttt.actions(board):
+            after = ttt.result(board, action)
+            values[str(after)] = ttt.value(after)
+
+    game = mnk.Game()
+    engines = dict(ENGINES)
+    engines["mnk"] = (lambda board: game.best_move(board, math.inf), None)
+
+    disagreements = 0
+    for engine, (move_function, _) in engines.items():
+        reset()
+        for board in positions:
+            move = move_function(board)
+            disagreements += \
+                values[str(ttt.result(board, move))] != values[str(board)]
+    reset()
+    return len(positions), disagreements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Tic Tac Toe AIs.")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per engine and position")
+    args = parser.parse_args()
+
+    results, disagreements = benchmark(args.repeat)
+
+    print(f"{'position':<14}{'engine':<11}{'move':<8}{'ms':>10}"
+          f"{'nodes':>9}{'nodes/s':>12}{'hits':>7}")
+    for result in results:
+        rate = result["cache_hit_rate"]
+        print(f"{result['position']:<14}{result['engine']:<11}"
+              f"{str(tuple(result['move'])):<8}"
+              f"{result['seconds'] * 1000:>10.3f}{result['nodes']:>9}"
+              f"{result['nodes_per_second'] or 0:>12.0f}"
+              f"{'' if rate is None else f'{rate:.0%}':>7}"
+              f"{'' if result['agrees'] else '  DISAGREES'}")
+
+    positions, warm_disagreements = warm_pass()
+    print(f"Warm caches: {positions} positions per engine, "
+          f"{warm_disagreements} disagreements")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "disagreements": disagreements,
+                       "warm_disagreements": warm_disagreements},
+                      f, indent=2)
+
+    disagreements += warm_disagreements
+    if disagreements:
+        sys.exit(f"{disagreements} moves disagree with minimax")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Bitboard Tic Tac Toe engine
+
+Each player's marks are a 9-bit int, with cell (i, j) at bit 3 * i + j.
+A position is the pair (x, o) of both players' bits.
+"""
+
+from tictactoe import X, O, EMPTY, SYMMETRIES, INVERSES
+
+FULL = 0b111111111
+
+WIN_MASKS = (0b000000111, 0b000111000, 0b111000000,
+             0b001001001, 0b010010010, 0b100100100,
+             0b100010001, 0b001010100)
+
+# WINNING[bits] is True if the marks in bits complete any line
+WINNING = [any(bits & mask == mask for mask in WIN_MASKS)
+           for bits in range(FULL + 1)]
+
+# POPCOUNT[bits] is the number of marks in bits
+POPCOUNT = [bin(bits).count("1") for bits in range(FULL + 1)]
+
+# PERMUTED[s][bits] is bits with each cell moved by SYMMETRIES[s]
+PERMUTED = [[sum(1 << permutation[cell] for cell in range(9)
+                 if bits >> cell & 1)
+             for bits in range(FULL + 1)]
+            for permutation in SYMMETRIES]
+
+# Cached minimax values of positions, keyed on their canonical (x, o)
+values = {}
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards for a board in the list format.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the board in the list format for (x, o) bitboards.
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def to_action(cell):
+    """
+    Returns the action (i, j) for a cell index.
+    """
+    return divmod(cell, 3)
+
+
+def from_action(action):
+    """
+    Returns the cell index for an action (i, j).
+    """
+    return 3 * action[0] + action[1]
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return X if POPCOUNT[x] == POPCOUNT[o] else O
+
+
+def actions(x, o):
+    """
+    Returns the mask of empty cells.
+    """
+    return FULL & ~(x | o)
+
+
+def result(x, o, cell):
+    """
+    Returns the (x, o) position after the current player marks cell.
+    """
+    bit = 1 << cell
+    if (x | o) & bit:
+        raise NameError("Action is not valid")
+    if POPCOUNT[x] == POPCOUNT[o]:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINNING[x] or WINNING[o] or (x | o) == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def canonical(x, o):
+    """
+    Returns (x, o, symmetry): the smallest of the position's 8 symmetric
+    images, and the index into SYMMETRIES of the transformation that
+    produces it.
+    """
+    best = None
+    for symmetry, table in enumerate(PERMUTED):
+        image = (table[x], table[o])
+        if best is None or image < best:
+            best = image
+            best_symmetry = symmetry
+    return best[0], best[1], best_symmetry
+
+
+def canonical_cell(cell, symmetry):
+    """
+    Maps a cell of a position to the same cell of its canonical image.
+    """
+    return SYMMETRIES[symmetry][cell]
+
+
+def original_cell(cell, symmetry):
+    """
+    Maps a cell of the canonical image back to the original position.
+    """
+    return INVERSES[symmetry][cell]
+
+
+def value(x, o):
+    """
+    Returns the minimax value of the position under optimal play.
+    """
+    cx, co, _ = canonical(x, o)
+    key = (cx, co)
+    if key in values:
+        return values[key]
+
+    if WINNING[x]:
+        score = 1
+    elif WINNING[o]:
+        score = -1
+    elif (x | o) == FULL:
+        score = 0
+    else:
+        empty = FULL & ~(x | o)
+        x_to_move = POPCOUNT[x] == POPCOUNT[o]
+        score = -2 if x_to_move else 2
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            if x_to_move:
+                score = max(score, value(x | bit, o))
+                if score == 1:
+                    break
+            else:
+                score = min(score, value(x, o | bit))
+                if score == -1:
+                    break
+    values[key] = score
+    return score
+
+
+def minimax(x, o):
+    """
+    Returns the optimal cell for the current player, or None if the
+    position is terminal.
+    """
+    if terminal(x, o):
+        return None
+
+    x_to_move = POPCOUNT[x] == POPCOUNT[o]
+    best_cell = None
+    best_score = None
+    empty = FULL & ~(x | o)
+    for cell in range(9):
+        bit = 1 << cell
+        if not empty & bit:
+            continue
+        if x_to_move:
+            score = value(x | bit, o)
+            if best_score is None or score > best_score:
+                best_cell, best_score = cell, score
+        else:
+            score = value(x, o | bit)
+            if best_score is None or score < best_score:
+                best_cell, best_score = cell, score
+    return best_cell
+
+
+def best_action(board):
+    """
+    Returns the optimal action (i, j) for a board in the list format,
+    or None if the board is terminal.
+    """
+    cell = minimax(*from_board(board))
+    return None if cell is None else to_action(cell)
@@ -0,0 +1,539 @@
+"""
+m,n,k-game engine: Tic Tac Toe generalized to a board of any number of
+rows and columns, won by k marks in a row.
+"""
+
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score of a won position, far above any heuristic evaluation
+WIN = 10 ** 9
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+class Position():
+    """
+    A board position for searching, changed in place by make_move and
+    undo_move. Alongside the flat cells it keeps the move count, the set
+    of empty cells, the number of each player's marks on every line,
+    completed lines, the heuristic score, marked neighbors of each cell
+    and a Zobrist hash, all updated incrementally per move.
+    """
+
+    def __init__(self, game, board):
+        self.game = game
+        self.cells = [EMPTY] * (game.rows * game.cols)
+        self.moves = 0
+        self.empty = set(range(len(self.cells)))
+        self.x_counts = [0] * len(game.lines)
+        self.o_counts = [0] * len(game.lines)
+        self.completed = 0
+        self.score = 0
+        self.near = [0] * len(self.cells)
+        self.hash = 0
+
+        # Replay the board's marks, X's and O's alternately
+        cells = [cell for row in board for cell in row]
+        xs = [c for c, cell in enumerate(cells) if cell == X]
+        os = [c for c, cell in enumerate(cells) if cell == O]
+        for i in range(len(xs)):
+            self.make_move(xs[i])
+            if i < len(os):
+                self.make_move(os[i])
+
+    def make_move(self, cell):
+        """
+        Marks cell for the player to move. Returns True if the move
+        completes a line.
+        """
+        game = self.game
+        mark = X if self.moves % 2 == 0 else O
+        self.cells[cell] = mark
+        self.moves += 1
+        self.empty.remove(cell)
+        self.hash ^= game.zobrist[cell][mark]
+        for n in game.neighbors[cell]:
+            self.near[n] += 1
+
+        scores = game.line_scores
+        x_counts = self.x_counts
+        o_counts = self.o_counts
+        completed = self.completed
+        for line in game.cell_lines[cell]:
+            x, o = x_counts[line], o_counts[line]
+            if mark == X:
+                x_counts[line] = x + 1
+                self.score += scores[x + 1][o] - scores[x][o]
+                if x + 1 == game.k:
+                    self.completed += 1
+            else:
+                o_counts[line] = o + 1
+                self.score += scores[x][o + 1] - scores[x][o]
+                if o + 1 == game.k:
+                    self.completed += 1
+        return self.completed > completed
+
+    def undo_move(self, cell):
+        """
+        Removes the mark at cell, which must be the last move made.
+        """
+        game = self.game
+        mark = self.cells[cell]
+        self.cells[cell] = EMPTY
+        self.moves -= 1
+        self.empty.add(cell)
+        self.hash ^= game.zobrist[cell][mark]
+        for n in game.neighbors[cell]:
+            self.near[n] -= 1
+
+        scores = game.line_scores
+        x_counts = self.x_counts
+        o_counts = self.o_counts
+        for line in game.cell_lines[cell]:
+            x, o = x_counts[line], o_counts[line]
+            if x == game.k or o == game.k:
+                self.completed -= 1
+            if mark == X:
+                x_counts[line] = x - 1
+                self.score += scores[x - 1][o] - scores[x][o]
+            else:
+                o_counts[line] = o - 1
+                self.score += scores[x][o - 1] - scores[x][o]
+
+
+class Game():
+    """
+    Rules and search for an m,n,k-game. Boards use the same nested-list
+    format as tictactoe.py; the search works on a Position, whose cell
+    (i, j) is at index i * cols + j.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+
+        # Every run of k cells in a row, column or diagonal
+        self.lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.lines.append(tuple(
+                            (i + di * step) * cols + j + dj * step
+                            for step in range(k)
+                        ))
+
+        # Indexes of the lines through each cell
+        self.cell_lines = [[] for _ in range(rows * cols)]
+        for index, line in enumerate(self.lines):
+            for cell in line:
+                self.cell_lines[cell].append(index)
+
+        # Cells within one step of each cell, for choosing candidate moves
+        self.neighbors = [
+            [ni * cols + nj
+             for ni in range(max(0, i - 1), min(rows, i + 2))
+             for nj in range(max(0, j - 1), min(cols, j + 2))
+             if (ni, nj) != (i, j)]
+            for i in range(rows) for j in range(cols)
+        ]
+
+        # Cells ordered from the center outwards
+        center_i = (rows - 1) / 2
+        center_j = (cols - 1) / 2
+        self.center_order = sorted(
+            range(rows * cols),
+            key=lambda cell: (abs(cell // cols - center_i)
+                              + abs(cell % cols - center_j), cell)
+        )
+
+        # LINE_SCORES[x][o] is a line's heuristic worth to X when it holds
+        # x of X's marks and o of O's: only lines still open to a single
+        # player count, weighted steeply by how full they are
+        self.line_scores = [[4 ** x if x and not o else
+                             -4 ** o if o and not x else 0
+                             for o in range(k + 1)] for x in range(k + 1)]
+
+        # Random keys per cell and mark, XORed into a position's hash
+        rng = random.Random(0)
+        self.zobrist = [{X: rng.getrandbits(64), O: rng.getrandbits(64)}
+                        for _ in range(rows * cols)]
+
+        # Transposition table: position hash -> (depth, score, flag, move)
+        self.transpositions = {}
+
+        # Search statistics: nodes visited, and transposition table
+        # probes and probes answered from the table, since best_move
+        self.nodes = 0
+        self.probes = 0
+        self.hits = 0
+        self.deadline = None
+
+        # Worker pool for parallel_best_move, and the number of processes
+        # it was asked for
+        self.pool = None
+        self.pool_processes = None
+
+        # Entries of depth 2 or more written by negamax, collected while
+        # this game searches for parallel_best_move so they can be shared
+        self.exported = None
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        filled = sum(cell is not EMPTY for row in board for cell in row)
+        return X if filled % 2 == 0 else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.rows) for j in range(self.cols)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the
+        board, leaving the original board unchanged.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.cols) \
+                or board[i][j] != EMPTY:
+            raise NameError("Action is not valid")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = self.flatten(board)
+        for line in self.lines:
+            first = cells[line[0]]
+            if first is not EMPTY and all(cells[c] == first for c in line):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        if self.winner(board) is not None:
+            return True
+        return all(cell is not EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        won = self.winner(board)
+        return 1 if won == X else -1 if won == O else 0
+
+    def flatten(self, board):
+        """Returns the board as a flat list of cells."""
+        return [cell for row in board for cell in row]
+
+    def candidates(self, position):
+        """
+        Returns the empty cells worth searching, center outwards. On
+        boards larger than 4x4 only cells next to a mark are considered.
+        """
+        cells = position.cells
+        if len(cells) <= 16 or position.moves == 0:
+            return [c for c in self.center_order if cells[c] is EMPTY]
+        near = position.near
+        return [c for c in self.center_order
+                if cells[c] is EMPTY and near[c]]
+
+    def negamax(self, position, depth, alpha, beta):
+        """
+        Returns the score of the position for the player to move,
+        searching `depth` more plies with alpha-beta pruning. Moves are
+        made and undone in place on `position`.
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % 128 == 0 \
+                and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if not position.empty:
+            return 0
+        if depth == 0:
+            return position.score if position.moves % 2 == 0 \
+                else -position.score
+
+        key = position.hash
+        entry = self.transpositions.get(key)
+        hint = None
+        self.probes += 1
+        if entry is not None:
+            # Only reuse scores searched to the same depth, so that the
+            # result depends on the position and depth alone
+            entry_depth, score, flag, hint = entry
+            if entry_depth == depth and (
+                flag == 0
+                or (flag < 0 and score <= alpha)
+                or (flag > 0 and score >= beta)
+            ):
+                self.hits += 1
+                return score
+
+        moves = self.candidates(position)
+        if hint is not None and hint in moves:
+            moves.remove(hint)
+            moves.insert(0, hint)
+
+        original_alpha = alpha
+        best = -WIN - 1
+        best_move = None
+        for cell in moves:
+            if position.make_move(cell):
+                score = WIN - position.moves
+            else:
+                score = -self.negamax(position, depth - 1, -beta, -alpha)
+            position.undo_move(cell)
+            if score > best:
+                best = score
+                best_move = cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        # Store whether the score is exact, an upper or a lower bound
+        if best <= original_alpha:
+            flag = -1
+        elif best >= beta:
+            flag = 1
+        else:
+            flag = 0
+        self.transpositions[key] = (depth, best, flag, best_move)
+        if depth >= 2 and self.exported is not None:
+            self.exported[key] = self.transpositions[key]
+        return best
+
+    def root_search(self, position, depth, moves):
+        """
+        Searches each root move to `depth` and returns (score, cell) for
+        the best one. Moves are tried in the order given.
+        """
+        alpha = -WIN - 1
+        best_move = moves[0]
+        for cell in moves:
+            if position.make_move(cell):
+                score = WIN - position.moves
+            else:
+                score = -self.negamax(position, depth - 1, -WIN - 1, -alpha)
+            position.undo_move(cell)
+            if score > alpha:
+                alpha = score
+                best_move = cell
+        return alpha, best_move
+
+    def best_move(self, board, budget=1.0, max_depth=None):
+        """
+        Returns an action (i, j) for the current player found by
+        iterative-deepening alpha-beta search, returning the best move of
+        the deepest search completed within `budget` seconds. Returns
+        None if the board is terminal.
+        """
+        if self.terminal(board):
+            return None
+
+        position = Position(self, board)
+        empty = len(position.empty)
+        moves = self.candidates(position)
+        best = moves[0]
+        self.nodes = self.probes = self.hits = 0
+        self.deadline = time.perf_counter() + budget
+        try:
+            for depth in range(1, (max_depth or empty) + 1):
+                score, best = self.root_search(position, depth, moves)
+
+                # Search the best move first at the next depth
+                moves.remove(best)
+                moves.insert(0, best)
+
+                # Stop once the game is decided or fully searched
+                if abs(score) > WIN - len(position.cells) - 1 \
+                        or depth >= empty:
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        return divmod(best, self.cols)
+
+    def parallel_best_move(self, board, budget=1.0, max_depth=None,
+                           processes=None):
+        """
+        Returns the same move as best_move, but searches the root moves
+        of each iteration over a pool of `processes` workers (all cores
+        by default). The first move is searched with a full window, then
+        the others in parallel with the window the sequential search
+        would give them, which still scores exactly any move better than
+        the first. Workers keep their transposition tables between
+        searches, and the entries of depth 2 or more each one finds are
+        merged into this game's table and passed on to the others.
+        Asking for a different number of processes than the last call
+        replaces the pool, and its workers start with empty tables.
+        """
+        if self.terminal(board):
+            return None
+        if self.pool is not None and self.pool_processes != processes:
+            self.close()
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(
+                processes, initializer=init_worker,
+                initargs=(self.rows, self.cols, self.k)
+            )
+            self.pool_processes = processes
+
+        position = Position(self, board)
+        cells = position.cells
+        empty = len(position.empty)
+        moves = self.candidates(position)
+        best = moves[0]
+        deadline = time.time() + budget
+
+        # Entries found since they were last sent to the workers
+        shared = {}
+
+        def merge(entries):
+            for key, entry in entries.items():
+                known = self.transpositions.get(key)
+                if known is None or known[0] <= entry[0]:
+                    self.transpositions[key] = entry
+                    shared[key] = entry
+
+        for depth in range(1, (max_depth or empty) + 1):
+            first = self.pool.apply(search_root_move, (
+                (cells, depth, moves[0], -WIN - 1, deadline, shared),
+            ))
+            if first is None:
+                break
+            score, entries = first
+            merge(entries)
+
+            results = self.pool.map(search_root_move, [
+                (cells, depth, cell, score, deadline, shared)
+                for cell in moves[1:]
+            ])
+            if any(result is None for result in results):
+                break
+            shared = {}
+
+            best = moves[0]
+            for cell, (move_score, entries) in zip(moves[1:], results):
+                if move_score > score:
+                    score = move_score
+                    best = cell
+                merge(entries)
+
+            # Search the best move first at the next depth
+            moves.remove(best)
+            moves.insert(0, best)
+
+            # Stop once the game is decided or fully searched
+            if abs(score) > WIN - len(cells) - 1 or depth >= empty:
+                break
+        return divmod(best, self.cols)
+
+    def close(self):
+        """Shuts down the worker pool used by parallel_best_move."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+            self.pool_processes = None
+
+
+# Game used by each parallel search worker process
+worker_game = None
+
+
+def init_worker(rows, cols, k):
+    """Creates the worker process's own game and transposition table."""
+    global worker_game
+    worker_game = Game(rows, cols, k)
+    worker_game.exported = {}
+
+
+def search_root_move(task):
+    """
+    Searches one root move in a worker process, as root_search would
+    with `alpha` the best score so far, after merging the `shared`
+    entries into the worker's table. Returns (score, entries), where
+    entries are the new transposition entries of depth 2 or more, or
+    None if the wall-clock deadline passed first.
+    """
+    cells, depth, cell, alpha, deadline, shared = task
+    game = worker_game
+    for key, entry in shared.items():
+        known = game.transpositions.get(key)
+        if known is None or known[0] <= entry[0]:
+            game.transpositions[key] = entry
+
+    position = Position(game, [cells])
+    if position.make_move(cell):
+        return WIN - position.moves, {}
+
+    game.deadline = time.perf_counter() + (deadline - time.time())
+    try:
+        score = -game.negamax(position, depth - 1, -WIN - 1, -alpha)
+    except SearchTimeout:
+        return None
+    finally:
+        game.deadline = None
+        entries = game.exported
+        game.exported = {}
+    return score, entries
+
+
+def main():
+    if len(sys.argv) not in (5, 6):
+        sys.exit("Usage: python mnk.py rows cols k depth [moves]")
+    rows, cols, k, depth = map(int, sys.argv[1:5])
+    opening = int(sys.argv[5]) if len(sys.argv) == 6 else 2
+
+    # Play a few center-out opening moves so the position is not empty
+    game = Game(rows, cols, k)
+    board = game.initial_state()
+    for cell in game.center_order[:opening]:
+        board = game.result(board, divmod(cell, cols))
+
+    start = time.perf_counter()
+    sequential = Game(rows, cols, k).best_move(board, math.inf, depth)
+    base = time.perf_counter() - start
+    print(f"sequential: {sequential} in {base:.3f}s")
+
+    for processes in range(1, multiprocessing.cpu_count() + 1):
+        game = Game(rows, cols, k)
+        game.parallel_best_move(board, 0, 1, processes)
+        start = time.perf_counter()
+        move = game.parallel_best_move(board, math.inf, depth, processes)
+        elapsed = time.perf_counter() - start
+        game.close()
+        print(f"{processes} processes: {move} in {elapsed:.3f}s, "
+              f"speedup {base / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
+import os
 import pygame
 import sys
 import time
 
+import mnk
 import tictactoe as ttt
 
+# Board shape: ROWS x COLS, won by K in a row
+ROWS = 3
+COLS = 3
+K = 3
+
+# Seconds the AI may think per move on boards other than 3x3
+AI_BUDGET = 1.0
+
+game = mnk.Game(ROWS, COLS, K)
+
+# The classic 3x3 game is played perfectly from the solved game
+classic = (ROWS, COLS, K) == (3, 3, 3)
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -15,12 +30,25 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+tile_size = min(80, 300 // max(ROWS, COLS))
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
+board = game.initial_state()
 ai_turn = False
 
+# Load the solved game, solving and saving it on the first run.
+# A solution table written by solve.py is used in preference.
+BOOK = "book.bin"
+TRANSPOSITIONS = "transpositions.bin"
+if classic and os.path.exists(BOOK):
+    ttt.load_book(BOOK)
+elif classic and os.path.exists(TRANSPOSITIONS):
+    ttt.load_transpositions(TRANSPOSITIONS)
+elif classic:
+    ttt.value(board)
+    ttt.save_transpositions(TRANSPOSITIONS)
+
 while True:
 
     for event in pygame.event.get():
@@ -67,13 +95,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (COLS / 2 * tile_size),
+                       height / 2 - (ROWS / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(ROWS):
             row = []
-            for j in range(3):
+            for j in range(COLS):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -89,12 +116,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -111,9 +138,11 @@ while True:
         # Check for AI move
         if user != player and not game_over:
             if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
+                if classic:
+                    move = ttt.minimax(board)
+                else:
+                    move = game.best_move(board, AI_BUDGET)
+                board = game.result(board, move)
                 ai_turn = False
             else:
                 ai_turn = True
@@ -122,10 +151,10 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(ROWS):
+                for j in range(COLS):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        board = game.result(board, (i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -140,7 +169,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
+                    board = game.initial_state()
                     ai_turn = False
 
     pygame.display.flip()
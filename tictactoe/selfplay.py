@@ -0,0 +1,154 @@
+"""
+Headless Tic Tac Toe self-play
+
+Plays many games between two configurable players over a process pool,
+streaming one JSON line per game (players, winner, moves and per-move
+times) to a file and printing a summary at the end.
+
+Players:
+    minimax     perfect play from tictactoe.minimax (3x3 only)
+    random      a uniformly random empty cell
+    depth:N     the m,n,k engine searching N plies deep
+
+Usage: python selfplay.py X-PLAYER O-PLAYER [--games N] [--out FILE] ...
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+import mnk
+import tictactoe as ttt
+
+# Per-process state, created once by init_worker and shared by every game
+# a worker plays, so transposition tables stay warm between games
+worker_game = None
+worker_engines = {}
+
+
+def init_worker(rows, cols, k):
+    """Creates the worker's game rules and empties its engine cache."""
+    global worker_game
+    worker_game = mnk.Game(rows, cols, k)
+    worker_engines.clear()
+
+
+def choose_move(spec, board, rng):
+    """Returns the move the player described by `spec` makes on board."""
+    if spec == "random":
+        return rng.choice(sorted(worker_game.actions(board)))
+    if spec == "minimax":
+        return ttt.minimax(board)
+    if spec.startswith("depth:"):
+        if spec not in worker_engines:
+            game = worker_game
+            worker_engines[spec] = mnk.Game(game.rows, game.cols, game.k)
+        return worker_engines[spec].best_move(board, math.inf,
+                                              int(spec[len("depth:"):]))
+    raise ValueError(f"unknown player {spec!r}")
+
+
+def play(task):
+    """
+    Plays one game and returns its record as a dict.
+    """
+    index, seed, x_spec, o_spec = task
+    rng = random.Random(seed)
+    game = worker_game
+    board = game.initial_state()
+    moves = []
+    move_times = []
+    while not game.terminal(board):
+        spec = x_spec if game.player(board) == ttt.X else o_spec
+        start = time.perf_counter()
+        move = choose_move(spec, board, rng)
+        move_times.append(time.perf_counter() - start)
+        moves.append(list(move))
+        board = game.result(board, move)
+    return {
+        "game": index,
+        "seed": seed,
+        "x": x_spec,
+        "o": o_spec,
+        "winner": game.winner(board),
+        "moves": moves,
+        "move_times": move_times
+    }
+
+
+def validate(spec, rows, cols, k):
+    """Exits with a message if `spec` is not a usable player."""
+    if spec == "random":
+        return
+    if spec == "minimax":
+        if (rows, cols, k) != (3, 3, 3):
+            sys.exit("minimax can only play the 3x3 game")
+        return
+    if spec.startswith("depth:") and spec[len("depth:"):].isdigit() \
+            and int(spec[len("depth:"):]) > 0:
+        return
+    sys.exit(f"unknown player {spec!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless self-play.")
+    parser.add_argument("x", help="player for X")
+    parser.add_argument("o", help="player for O")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--swap", action="store_true",
+                        help="swap sides every other game")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--out", default="selfplay.jsonl",
+                        help="file to stream game records to")
+    args = parser.parse_args()
+    for spec in (args.x, args.o):
+        validate(spec, args.rows, args.cols, args.k)
+
+    tasks = []
+    for index in range(args.games):
+        x_spec, o_spec = args.x, args.o
+        if args.swap and index % 2:
+            x_spec, o_spec = o_spec, x_spec
+        tasks.append((index, args.seed + index, x_spec, o_spec))
+
+    wins = {args.x: 0, args.o: 0}
+    sides = {ttt.X: 0, ttt.O: 0, None: 0}
+    move_times = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes, initializer=init_worker,
+                              initargs=(args.rows, args.cols, args.k)) \
+            as pool, open(args.out, "w") as out:
+        chunksize = max(1, args.games // (8 * (args.processes or
+                                               multiprocessing.cpu_count())))
+        for record in pool.imap_unordered(play, tasks, chunksize):
+            out.write(json.dumps(record) + "\n")
+            move_times.extend(record["move_times"])
+            sides[record["winner"]] += 1
+            if record["winner"] is not None:
+                wins[record["x"] if record["winner"] == ttt.X
+                     else record["o"]] += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.games} games in {elapsed:.2f}s "
+          f"({args.games / elapsed:.1f} games/sec)")
+    print(f"    X wins: {sides[ttt.X]}, O wins: {sides[ttt.O]}, "
+          f"ties: {sides[None]}")
+    if args.x != args.o:
+        for spec, won in wins.items():
+            print(f"    {spec} wins: {won}")
+    if move_times:
+        print(f"    mean move time {sum(move_times) / len(move_times) * 1000:.3f}"
+              f" ms, max {max(move_times) * 1000:.3f} ms")
+    print(f"    records written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
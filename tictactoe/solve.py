@@ -0,0 +1,62 @@
+"""
+Solves every reachable Tic Tac Toe position and writes the solution
+table that tictactoe.load_book reads.
+
+Usage: python solve.py [book.bin]
+"""
+
+import sys
+
+import tictactoe as ttt
+
+
+def canonical_board(board, symmetry):
+    """
+    Returns the image of the board under SYMMETRIES[symmetry].
+    """
+    image = ttt.initial_state()
+    for i in range(3):
+        for j in range(3):
+            ci, cj = ttt.canonical_action((i, j), symmetry)
+            image[ci][cj] = board[i][j]
+    return image
+
+
+def solve():
+    """
+    Returns the solution table as bytes: for each canonical position
+    reachable from the empty board, its value and best move.
+    """
+    table = bytearray(3 ** 9)
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        code, symmetry = ttt.canonical(board)
+        if table[code]:
+            continue
+
+        image = canonical_board(board, symmetry)
+        if ttt.terminal(image):
+            table[code] = (ttt.utility(image) + 2) << 4 | ttt.NO_MOVE
+            continue
+
+        i, j = ttt.minimax(image)
+        table[code] = (ttt.value(image) + 2) << 4 | (3 * i + j)
+        for action in ttt.actions(image):
+            frontier.append(ttt.result(image, action))
+    return bytes(table)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python solve.py [book.bin]")
+    path = sys.argv[1] if len(sys.argv) == 2 else "book.bin"
+    table = solve()
+    with open(path, "wb") as f:
+        f.write(table)
+    solved = sum(1 for entry in table if entry)
+    print(f"Solved {solved} canonical positions into {path}")
+
+
+if __name__ == "__main__":
+    main()
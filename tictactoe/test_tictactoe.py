@@ -1,3 +1,11 @@
+import functools
+import math
+import random
+
+import bitboard
+import mnk
+import solve
+import tictactoe as ttt
 from tictactoe import initial_state, player, actions, result, printBoard, winner, terminal, utility, minimax
 
 X = "X"
@@ -79,4 +87,181 @@ board = [[X, O, X],
          [O, O, EMPTY]]
 print(player(board))
 print(terminal(board))
-print(minimax(board))
\ No newline at end of file
+print(minimax(board))
+
+
+def reachable_positions():
+    """Returns every non-terminal board reachable from the empty board."""
+    positions = []
+    seen = set()
+    frontier = [initial_state()]
+    while frontier:
+        board = frontier.pop()
+        if key(board) in seen or terminal(board):
+            continue
+        seen.add(key(board))
+        positions.append(board)
+        frontier.extend(result(board, action) for action in actions(board))
+    return positions
+
+
+def board_values(positions):
+    """Returns the minimax value of each position and its successors."""
+    values = {}
+    for board in positions:
+        for action in actions(board):
+            after = result(board, action)
+            values[key(after)] = ttt.value(after)
+        values[key(board)] = ttt.value(board)
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def reference():
+    """
+    Returns the reachable positions and the values of boards, computed
+    once for all tests.
+    """
+    positions = reachable_positions()
+    return positions, board_values(positions)
+
+
+def key(board):
+    """Returns a board as a hashable tuple."""
+    return tuple(map(tuple, board))
+
+
+def assert_optimal(values, board, action):
+    """Checks that the action keeps the minimax value of the board."""
+    assert action in actions(board)
+    assert values[key(result(board, action))] == values[key(board)]
+
+
+def test_alphabeta_warm_tables():
+    # Later searches reuse the bounds and values stored by earlier ones
+    positions, values = reference()
+    positions = list(positions)
+    rng = random.Random(0)
+    ttt.transpositions.clear()
+    ttt.bounds.clear()
+    for _ in range(3):
+        rng.shuffle(positions)
+        for board in positions:
+            assert_optimal(values, board, ttt.alphabeta(board))
+
+
+def test_bitboard_matches_value():
+    positions, values = reference()
+    bitboard.values.clear()
+    for board in positions:
+        x, o = bitboard.from_board(board)
+        assert bitboard.value(x, o) == values[key(board)]
+        assert_optimal(values, board, bitboard.best_action(board))
+
+
+def symmetric_images(board):
+    """Returns the 8 rotations and reflections of the board."""
+    images = []
+    for _ in range(4):
+        board = [list(row) for row in zip(*board[::-1])]
+        images.extend([board, [row[::-1] for row in board]])
+    return images
+
+
+def test_canonical_matches_symmetry():
+    positions, values = reference()
+    classes = {}
+    for board in positions:
+        code, symmetry = ttt.canonical(board)
+        images = symmetric_images(board)
+        assert {ttt.canonical(image)[0] for image in images} == {code}
+        assert {values[key(image)] for image in images} == \
+            {values[key(board)]}
+        classes.setdefault(code, set()).add(
+            frozenset(key(image) for image in images))
+
+        # canonical_action maps the board onto the image with that code
+        image = initial_state()
+        for i in range(3):
+            for j in range(3):
+                ci, cj = ttt.canonical_action((i, j), symmetry)
+                image[ci][cj] = board[i][j]
+                assert ttt.original_action((ci, cj), symmetry) == (i, j)
+        assert sum(digit * 3 ** cell for cell, digit
+                   in enumerate(ttt.board_cells(image))) == code
+
+    # Boards share a code only if they are images of each other
+    assert all(len(images) == 1 for images in classes.values())
+
+
+def test_minimax_matches_value():
+    positions, values = reference()
+    ttt.transpositions.clear()
+    for board in positions:
+        assert_optimal(values, board, minimax(board))
+
+
+def test_mnk_matches_value():
+    positions, values = reference()
+    game = mnk.Game()
+    for board in positions:
+        assert_optimal(values, board, game.best_move(board, math.inf))
+
+
+def test_book_matches_value(tmp_path):
+    positions, values = reference()
+    path = tmp_path / "book.bin"
+    path.write_bytes(solve.solve())
+    ttt.load_book(path)
+    ttt.transpositions.clear()
+    try:
+        for board in positions:
+            code, _ = ttt.canonical(board)
+            assert (ttt.book[code] >> 4) - 2 == values[key(board)]
+            assert_optimal(values, board, minimax(board))
+
+        # Every move came from the book, without searching
+        assert not ttt.transpositions
+    finally:
+        ttt.book = None
+
+
+def random_position(game, rng):
+    """Returns a board in progress after a few random moves."""
+    while True:
+        board = game.initial_state()
+        for _ in range(rng.randrange(1, 5)):
+            board = game.result(board, rng.choice(sorted(game.actions(board))))
+            if game.terminal(board):
+                break
+        else:
+            return board
+
+
+def test_parallel_matches_sequential():
+    rng = random.Random(0)
+    for rows, cols, k in ((4, 4, 3), (5, 5, 4), (4, 4, 4)):
+        game = mnk.Game(rows, cols, k)
+        try:
+            for _ in range(4):
+                board = random_position(game, rng)
+                sequential = mnk.Game(rows, cols, k).best_move(
+                    board, math.inf, 3)
+                assert game.parallel_best_move(
+                    board, math.inf, 3, processes=2) == sequential
+        finally:
+            game.close()
+
+
+def test_parallel_pool_follows_processes():
+    game = mnk.Game(4, 4, 3)
+    board = game.initial_state()
+    try:
+        game.parallel_best_move(board, math.inf, 1, processes=2)
+        pool = game.pool
+        game.parallel_best_move(board, math.inf, 1, processes=2)
+        assert game.pool is pool
+        game.parallel_best_move(board, math.inf, 1, processes=1)
+        assert game.pool is not pool and game.pool_processes == 1
+    finally:
+        game.close()
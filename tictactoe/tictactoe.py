@@ -9,6 +9,70 @@ X = "X"
 O = "O"
 EMPTY = None
 
+# The 8 symmetries of the board (rotations and reflections), each given
+# as a permutation: SYMMETRIES[s][cell] is where cell 3 * i + j moves to
+SYMMETRIES = tuple(
+    tuple(3 * i2 + j2 for i2, j2 in (transform(i, j)
+                                     for i in range(3) for j in range(3)))
+    for transform in (
+        lambda i, j: (i, j),
+        lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j),
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i)
+    )
+)
+
+# INVERSES[s] is the permutation that undoes SYMMETRIES[s]
+INVERSES = tuple(
+    tuple(permutation.index(cell) for cell in range(9))
+    for permutation in SYMMETRIES
+)
+
+# Place values for encoding each symmetric image of a board in base 3
+SYMMETRY_POWERS = tuple(
+    tuple(3 ** image for image in permutation) for permutation in SYMMETRIES
+)
+
+# The 8 lines of three cells, as flat cell indexes 3 * i + j, and for each
+# cell the lines through it, used to check for a win after a move
+LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8),
+         (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6))
+CELL_LINES = tuple(tuple(line for line in LINES if cell in line)
+                   for cell in range(9))
+
+# Transposition table: maps canonically encoded boards to their minimax value
+transpositions = {}
+
+# Bounds on the values of positions whose alpha-beta search was cut off,
+# as (lower, upper) pairs under the same canonical codes; exact values go
+# in transpositions
+bounds = {}
+
+# Solution table loaded by load_book: one byte per canonical code, 0 if
+# the position is missing, else (value + 2) << 4 | best cell, with
+# NO_MOVE as the cell of terminal positions
+book = None
+NO_MOVE = 15
+
+# Static move ordering for alpha-beta: center, then corners, then edges
+MOVE_PRIORITY = {(1, 1): 2,
+                 (0, 0): 1, (0, 2): 1, (2, 0): 1, (2, 2): 1,
+                 (0, 1): 0, (1, 0): 0, (1, 2): 0, (2, 1): 0}
+
+# The same ordering by flat cell index
+CELL_PRIORITY = tuple(MOVE_PRIORITY[divmod(cell, 3)] for cell in range(9))
+
+# Killer moves (by number of filled cells) and history scores (by cell)
+# learned from cutoffs during alpha-beta search, cleared by each call to
+# alphabeta so that its move only depends on the board
+killers = {}
+history = {}
+
 class Node():
     def __init__(self, state, parent, action):
         self.state =  state
@@ -153,29 +217,271 @@ def minimax(board):
     """
     if terminal(board): return None
     
-    desired_score = 0
-    current_score = 0
-    if player(board) == X: 
-        desired_score = 1
+    # Look the move up in the solution table if one is loaded
+    if book is not None:
+        code, symmetry = canonical(board)
+        entry = book[code] if code < len(book) else 0
+        if entry and entry & 0xF != NO_MOVE:
+            return original_action(divmod(entry & 0xF, 3), symmetry)
+    
+    current_player = player(board)
+    if current_player == X:
         current_score = -100
-    if player(board) == O: 
-        desired_score = -1
-        current_score = 100 
+    else:
+        current_score = 100
     
     available_actions = actions(board)
     selected_action = ()
     for action in available_actions:
-        new_board = result(board, action)
-        if player(board) == X:
-            if current_score < maxValue(new_board):
-                current_score = maxValue(new_board)
-                selected_action = action
-        if player(board) == O:
-            if current_score > minValue(new_board):
-                current_score = minValue(new_board)
-                selected_action = action
+        score = value(result(board, action))
+        if current_player == X and current_score < score:
+            current_score = score
+            selected_action = action
+        if current_player == O and current_score > score:
+            current_score = score
+            selected_action = action
     return selected_action
 
+def canonical(board):
+    """
+    Returns (code, symmetry): the smallest encoding of the board over its
+    8 rotations and reflections, and the index into SYMMETRIES of the
+    transformation that produces it. Symmetric boards share a code.
+    """
+    return canonical_code(board_cells(board))
+
+def canonical_code(digits):
+    """
+    Returns canonical(board) for the board given as a flat list of
+    digits, as made by board_cells.
+    """
+    best_code = None
+    best_symmetry = 0
+    for symmetry, powers in enumerate(SYMMETRY_POWERS):
+        code = 0
+        for digit, power in zip(digits, powers):
+            if digit:
+                code += digit * power
+        if best_code is None or code < best_code:
+            best_code = code
+            best_symmetry = symmetry
+    return best_code, best_symmetry
+
+def board_cells(board):
+    """
+    Returns the board as a flat list of 9 digits, cell 3 * i + j being
+    0 if empty, 1 for X and 2 for O. The searches below play moves on
+    this list in place and undo them, rather than copying boards.
+    """
+    return [1 if cell == X else 2 if cell == O else 0
+            for row in board for cell in row]
+
+def cells_winner(cells, lines):
+    """
+    Returns the digit of the player owning one of the given lines, or 0.
+    """
+    for a, b, c in lines:
+        if cells[a] and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return 0
+
+def canonical_action(action, symmetry):
+    """
+    Maps an action on the board to the same cell on its canonical image.
+    """
+    return divmod(SYMMETRIES[symmetry][3 * action[0] + action[1]], 3)
+
+def original_action(action, symmetry):
+    """
+    Maps an action on the canonical image back to the original board.
+    """
+    return divmod(INVERSES[symmetry][3 * action[0] + action[1]], 3)
+
+def value(board):
+    """
+    Returns the minimax value of the board (1, 0 or -1) under optimal
+    play, looking positions up in the transposition table so that each
+    position, and each of its symmetric images, is only searched once.
+    """
+    return cells_value(board_cells(board), LINES)
+
+def cells_value(cells, lines):
+    """
+    Returns the value of the position in cells, checking only `lines`
+    for a win: all of them at the root, afterwards those through the
+    last cell played.
+    """
+    key = canonical_code(cells)[0]
+    if key in transpositions:
+        return transpositions[key]
+    
+    won = cells_winner(cells, lines)
+    empty = cells.count(0)
+    if won:
+        score = 1 if won == 1 else -1
+    elif not empty:
+        score = 0
+    else:
+        digit = 1 if empty % 2 else 2
+        scores = []
+        for cell in range(9):
+            if not cells[cell]:
+                cells[cell] = digit
+                scores.append(cells_value(cells, CELL_LINES[cell]))
+                cells[cell] = 0
+        score = max(scores) if digit == 1 else min(scores)
+    transpositions[key] = score
+    return score
+
+def save_transpositions(path):
+    """
+    Writes the transposition table for 3x3 boards to a file, one byte
+    per encoded position: 0 if unknown, otherwise the value plus 2.
+    """
+    table = bytearray(3 ** 9)
+    for key, score in transpositions.items():
+        if key < len(table):
+            table[key] = score + 2
+    with open(path, "wb") as f:
+        f.write(table)
+
+def load_transpositions(path):
+    """
+    Loads a transposition table written by save_transpositions.
+    """
+    with open(path, "rb") as f:
+        table = f.read()
+    for key, byte in enumerate(table):
+        if byte:
+            transpositions[key] = byte - 2
+
+def load_book(path):
+    """
+    Loads a solution table written by solve.py, after which minimax
+    answers positions in the table with a single lookup.
+    """
+    global book
+    with open(path, "rb") as f:
+        book = f.read()
+
+def alphabeta(board):
+    """
+    Returns an optimal action for the current player, like minimax, but
+    found with alpha-beta pruning and move ordering so that far fewer
+    positions are visited. Returns None if the board is terminal.
+    """
+    if terminal(board): return None
+    killers.clear()
+    history.clear()
+    
+    cells = board_cells(board)
+    maximizing = cells.count(0) % 2 == 1
+    digit = 1 if maximizing else 2
+    alpha = -math.inf
+    beta = math.inf
+    selected_cell = None
+    for cell in ordered_cells(cells):
+        cells[cell] = digit
+        score = alphabeta_cells(cells, CELL_LINES[cell], alpha, beta)
+        cells[cell] = 0
+        if maximizing and score > alpha:
+            alpha = score
+            selected_cell = cell
+        if not maximizing and score < beta:
+            beta = score
+            selected_cell = cell
+        # Nothing can beat a win
+        if (alpha if maximizing else -beta) == 1:
+            break
+    return divmod(selected_cell, 3)
+
+def alphabeta_value(board, alpha, beta):
+    """
+    Returns the minimax value of the board if it lies strictly between
+    alpha and beta, otherwise a bound on the side of the window it fell.
+    """
+    return alphabeta_cells(board_cells(board), LINES, alpha, beta)
+
+def alphabeta_cells(cells, lines, alpha, beta):
+    """
+    Returns alphabeta_value for the position in cells, checking `lines`
+    for a win as in cells_value. Exact values are shared with value() in
+    the transposition table, and bounds from cut-off searches are kept
+    in bounds.
+    """
+    key = canonical_code(cells)[0]
+    if key in transpositions:
+        return transpositions[key]
+    lower, upper = bounds.get(key, (-1, 1))
+    if lower >= beta:
+        return lower
+    if upper <= alpha:
+        return upper
+    alpha = max(alpha, lower)
+    beta = min(beta, upper)
+    # An empty window can only confirm the bound already stored
+    if alpha >= beta:
+        return lower
+    
+    won = cells_winner(cells, lines)
+    empty = cells.count(0)
+    if won or not empty:
+        score = (1 if won == 1 else -1) if won else 0
+        transpositions[key] = score
+        return score
+    
+    ply = 9 - empty
+    maximizing = ply % 2 == 0
+    digit = 1 if maximizing else 2
+    original_alpha, original_beta = alpha, beta
+    best = -math.inf if maximizing else math.inf
+    for cell in ordered_cells(cells):
+        cells[cell] = digit
+        score = alphabeta_cells(cells, CELL_LINES[cell], alpha, beta)
+        cells[cell] = 0
+        if maximizing:
+            best = max(best, score)
+            alpha = max(alpha, best)
+        else:
+            best = min(best, score)
+            beta = min(beta, best)
+        if alpha >= beta:
+            # Remember the refutation for sibling and later searches
+            killers[ply] = cell
+            history[cell] = history.get(cell, 0) + (10 - ply) ** 2
+            break
+    
+    if best <= original_alpha:
+        store_bounds(key, lower, best)
+    elif best >= original_beta:
+        store_bounds(key, best, upper)
+    else:
+        transpositions[key] = best
+    return best
+
+def store_bounds(key, lower, upper):
+    """
+    Records bounds on the value of a position, moving it into the
+    transposition table once they meet.
+    """
+    if lower == upper:
+        transpositions[key] = lower
+        bounds.pop(key, None)
+    else:
+        bounds[key] = (lower, upper)
+
+def ordered_cells(cells):
+    """
+    Returns the empty cells, best candidates first: the killer move for
+    this ply, then by history score, then center, corners and edges.
+    """
+    killer = killers.get(9 - cells.count(0))
+    return sorted((cell for cell in range(9) if not cells[cell]),
+                  key=lambda cell: (cell != killer,
+                                    -history.get(cell, 0),
+                                    -CELL_PRIORITY[cell],
+                                    cell))
+
 def maxValue(board):
     if terminal(board):
         return utility(board)